@@ -0,0 +1,69 @@
+"""
+Compares two results of `run.py`, e.g. before and after a commit.
+
+Prints the time and memory of every case present in both, with their ratio (new / old), and exits with status 1
+if a case became slower than `--max-ratio` times its old time (and by more than `--min-seconds`),
+if it now fails, or if its final configurations changed: their number, or their total probability
+by more than `--tolerance`.
+
+    python benchmarks/compare.py OLD.json NEW.json [--max-ratio R] [--min-seconds S] [--tolerance T]
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path, "r") as f:
+        return {result["name"]: result for result in json.load(f)["results"]}
+
+
+def compare(old: dict, new: dict, max_ratio: float, min_seconds: float, tolerance: float) -> list[str]:
+    """Print the comparison of every common case; return the problems found."""
+    problems = list()
+    print(f"{'case':<24} {'old s':>9} {'new s':>9} {'ratio':>7} {'old KiB':>10} {'new KiB':>10} {'ratio':>7}")
+    for name, before in old.items():
+        after = new.get(name)
+        if after is None:
+            continue
+        if "error" in after:
+            print(f"{name:<24} error: {after['error']}")
+            if "error" not in before:
+                problems.append(f"{name}: fails ({after['error']})")
+            continue
+        if "error" in before:
+            print(f"{name:<24} {'-':>9} {after['time']:>9.3f}")
+            continue
+        time_ratio = after["time"] / before["time"] if before["time"] else float("inf")
+        rss_ratio = after["peak_rss_kib"] / before["peak_rss_kib"] if before["peak_rss_kib"] else float("inf")
+        print(f"{name:<24} {before['time']:>9.3f} {after['time']:>9.3f} {time_ratio:>7.2f} "
+              f"{before['peak_rss_kib']:>10} {after['peak_rss_kib']:>10} {rss_ratio:>7.2f}")
+        if time_ratio > max_ratio and after["time"] - before["time"] > min_seconds:
+            problems.append(f"{name}: {time_ratio:.2f} times slower")
+        if after["configurations"] != before["configurations"]:
+            problems.append(f"{name}: {before['configurations']} configurations, now {after['configurations']}")
+        if abs(after["mass"] - before["mass"]) > tolerance:
+            problems.append(f"{name}: total probability {before['mass']}, now {after['mass']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two results of benchmarks/run.py")
+    parser.add_argument("old", type=str)
+    parser.add_argument("new", type=str)
+    parser.add_argument("--max-ratio", type=float, default=1.2, help="largest accepted ratio of new to old time")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="slowdowns below this many seconds are accepted whatever their ratio")
+    parser.add_argument("--tolerance", type=float, default=1e-9,
+                        help="largest accepted change of the total probability of a result")
+    args = parser.parse_args()
+
+    problems = compare(load(args.old), load(args.new), args.max_ratio, args.min_seconds, args.tolerance)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
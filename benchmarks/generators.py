@@ -0,0 +1,181 @@
+"""
+Generators of benchmark topologies and protocols of any size.
+
+Topologies (`chain`, `ring`, `grid`, `random_graph`) number their `n` nodes so that consecutive nodes are always linked:
+every one of them holds the path `1, 2, ..., n`, along which the protocols distribute entanglement.
+They return the text of a topology file, with the same success probability `p` on every link
+and the same swap probability `q` at every node.
+
+Protocols (`linear`, `nested`, `retry`) return the source of a QNV program over the nodes `1` to `n`,
+written with loops so that their size does not depend on `n`.
+
+    python benchmarks/generators.py topology ring 64 ring64.top
+    python benchmarks/generators.py protocol nested 64 nested64.qnv
+"""
+
+import argparse
+import math
+import random
+
+
+def _topology(n: int, edges: list[tuple[int, int]], p: float, q: float) -> str:
+    lines = [f"{n} {len(edges)}"]
+    lines.extend(f"{x} {y} {p}" for x, y in edges)
+    lines.append(" ".join([str(q)] * n))
+    return "\n".join(lines) + "\n"
+
+
+def chain(n: int, p: float = 0.9, q: float = 0.9) -> str:
+    return _topology(n, [(x, x + 1) for x in range(1, n)], p, q)
+
+
+def ring(n: int, p: float = 0.9, q: float = 0.9) -> str:
+    return _topology(n, [(x, x + 1) for x in range(1, n)] + [(n, 1)], p, q)
+
+
+def grid(n: int, p: float = 0.9, q: float = 0.9) -> str:
+    """A grid `round(sqrt(n))` nodes wide (the last row may be partial), numbered row by row in alternating directions."""
+    width = max(1, round(math.sqrt(n)))
+
+    def node(row: int, col: int) -> int:
+        return row * width + (col if row % 2 == 0 else width - 1 - col) + 1
+
+    edges = {(x, x + 1) for x in range(1, n)}
+    for row in range(0, (n - 1) // width):
+        for col in range(0, width):
+            x, y = sorted((node(row, col), node(row + 1, col)))
+            if y <= n:
+                edges.add((x, y))
+    return _topology(n, sorted(edges), p, q)
+
+
+def random_graph(n: int, p: float = 0.9, q: float = 0.9, degree: float = 4.0, seed: int = 0) -> str:
+    """The path `1, ..., n` plus random links, up to an average of `degree` links per node."""
+    rng = random.Random(seed)
+    edges = {(x, x + 1) for x in range(1, n)}
+    target = min(int(n * degree / 2), n * (n - 1) // 2)
+    while len(edges) < target:
+        x, y = sorted(rng.sample(range(1, n + 1), 2))
+        edges.add((x, y))
+    return _topology(n, sorted(edges), p, q)
+
+
+TOPOLOGIES = {"chain": chain, "ring": ring, "grid": grid, "random": random_graph}
+
+
+def linear(n: int) -> str:
+    """Link neighbours one after the other and swap every new pair onto node 1, until nodes 1 and `n` share one."""
+    return f"""j = 1;
+while(j < {n}) {{
+    ret = cr(j, j + 1);
+    assert(ret == 1);
+    if(j > 1) {{
+        ret = sw(1, j + 1@ j);
+        assert(ret == 1);
+    }}
+    else {{
+        pass;
+    }}
+    j = j + 1;
+}}
+"""
+
+
+def nested(n: int) -> str:
+    """
+    The nested schedule of `qnv-tests/test1_pass.qnv` (which is `nested(16)`) over a ring of `n` nodes,
+    a power of two: segments of `d` links for `d = n / 2, n / 4, ..., 1`, each closed around the ring.
+    """
+    if n < 2 or n & (n - 1):
+        raise ValueError("nested protocols need a power of two nodes")
+    return f"""d = {n // 2};
+while(d > 0) {{
+    i = 1;
+    while(i + d <= {n}) {{
+        j = i;
+        while(j < i + d) {{
+            ret = cr(j, j + 1);
+            assert(ret == 1);
+            if(j > i) {{
+                ret = sw(i, j + 1@ j);
+                assert(ret == 1);
+            }}
+            else {{
+                pass;
+            }}
+            j = j + 1;
+        }}
+        i = i + d;
+    }}
+    if(d < {n // 2}) {{
+        j = i;
+        while(j < {n}) {{
+            ret = cr(j, j + 1);
+            assert(ret == 1);
+            if(j > i) {{
+                ret = sw(i, j + 1@ j);
+                assert(ret == 1);
+            }}
+            else {{
+                pass;
+            }}
+            j = j + 1;
+        }}
+        ret = cr({n}, 1);
+        assert(ret == 1);
+        if(d > 1) {{
+            ret = sw(i, 1@ {n});
+            assert(ret == 1);
+        }}
+        else {{
+            pass;
+        }}
+    }}
+    else {{
+        pass;
+    }}
+    d = d / 2;
+}}
+"""
+
+
+def retry(n: int, attempts: int = 3) -> str:
+    """`linear` without postselection: every link generation is retried up to `attempts` times, and failures carry on."""
+    return f"""j = 1;
+while(j < {n}) {{
+    t = 0;
+    ret = 0;
+    while(ret == 0 && t < {attempts}) {{
+        ret = cr(j, j + 1);
+        t = t + 1;
+    }}
+    if(j > 1) {{
+        ret = sw(1, j + 1@ j);
+    }}
+    else {{
+        pass;
+    }}
+    j = j + 1;
+}}
+"""
+
+
+PROTOCOLS = {"linear": linear, "nested": nested, "retry": retry}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a benchmark topology or protocol")
+    parser.add_argument("kind", choices=["topology", "protocol"])
+    parser.add_argument("name", choices=sorted(TOPOLOGIES) + sorted(PROTOCOLS))
+    parser.add_argument("n", type=int, help="number of nodes")
+    parser.add_argument("output", type=str)
+    args = parser.parse_args()
+    generators = TOPOLOGIES if args.kind == "topology" else PROTOCOLS
+    if args.name not in generators:
+        parser.error(f"unknown {args.kind}: {args.name}")
+    with open(args.output, "w") as f:
+        f.write(generators[args.name](args.n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Scaling benchmark of the analysis.
+
+Generates every protocol and topology of a suite at increasing sizes (see `generators.py`), analyses each case
+with `main.py --qnv` in a fresh process, and writes one JSON document, `{"meta": {...}, "results": [...]}`,
+with one result per case holding its median wall time in seconds, its peak resident memory in KiB,
+and the number and total probability of the final configurations.
+`compare.py` compares two such documents, e.g. produced before and after a commit.
+
+    python benchmarks/run.py [--suite quick|full] [--runs N] [--timeout S] [--out FILE] [-- MAIN.PY OPTIONS]
+
+Options after `--` (e.g. `--engine batch`) are passed to every run of `main.py`.
+Cases that fail or time out are recorded with an `"error"` instead of measurements.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from generators import PROTOCOLS, TOPOLOGIES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (protocol, topology, sizes) of every suite
+SUITES = {
+    "quick": [
+        ("linear", "chain", [64, 256, 1024]),
+        ("linear", "grid", [64, 256, 1024]),
+        ("linear", "random", [64, 256, 1024]),
+        ("nested", "ring", [16, 64, 256]),
+        ("retry", "chain", [8, 10, 12]),
+    ],
+    "full": [
+        ("linear", "chain", [64, 256, 1024, 4096]),
+        ("linear", "grid", [64, 256, 1024, 4096]),
+        ("linear", "random", [64, 256, 1024, 4096]),
+        ("nested", "ring", [16, 64, 256, 1024]),
+        ("retry", "chain", [8, 10, 12, 14]),
+        ("retry", "ring", [8, 10, 12, 14]),
+    ],
+}
+
+
+def cases(suite: str):
+    for protocol, topology, sizes in SUITES[suite]:
+        for n in sizes:
+            yield f"{protocol}/{topology}/{n}", protocol, topology, n
+
+
+def measure(argv: list[str], timeout: float) -> tuple[float, int]:
+    """
+    Wall time (seconds) and peak resident memory (KiB) of one run of `main.py` with `argv`.
+    Raises `RuntimeError` if the run fails or lasts more than `timeout` seconds.
+    """
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")] + argv,
+                                cwd=ROOT, stdout=subprocess.DEVNULL, stderr=stderr)
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        try:
+            # `wait4` reports the resource usage of this child alone
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            timer.cancel()
+        elapsed = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            if elapsed >= timeout:
+                raise RuntimeError(f"timed out after {timeout} s")
+            stderr.seek(0)
+            raise RuntimeError(stderr.read().decode(errors="replace").strip() or f"exit status {proc.returncode}")
+    return elapsed, usage.ru_maxrss
+
+
+def summary(path: str) -> tuple[int, float]:
+    """Number and total probability of the configurations of an NDJSON result."""
+    count = 0
+    mass = 0.0
+    with open(path, "r") as f:
+        for line in f:
+            count = count + 1
+            mass = mass + json.loads(line)["prob"]
+    return count, mass
+
+
+def run_case(workdir: str, protocol: str, topology: str, n: int, runs: int, timeout: float, extra: list[str]) -> dict:
+    program = os.path.join(workdir, f"{protocol}{n}.qnv")
+    topo = os.path.join(workdir, f"{topology}{n}.top")
+    output = os.path.join(workdir, "result.ndjson")
+    with open(program, "w") as f:
+        f.write(PROTOCOLS[protocol](n))
+    with open(topo, "w") as f:
+        f.write(TOPOLOGIES[topology](n))
+    # every loop of the protocols runs at most `n` iterations: none of them is cut by the default bound
+    argv = ["--qnv", "--input", program, "--topo", topo, "--output", output,
+            "--max-iterations", str(max(1000, n))] + extra
+
+    times, memory = list(), list()
+    for _ in range(0, runs):
+        elapsed, rss = measure(argv, timeout)
+        times.append(elapsed)
+        memory.append(rss)
+    configurations, mass = summary(output)
+    return {
+        "time": statistics.median(times),
+        "time_min": min(times),
+        "peak_rss_kib": max(memory),
+        "configurations": configurations,
+        "mass": mass,
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    argv = sys.argv[1:]
+    extra = list()
+    if "--" in argv:
+        extra = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    parser = argparse.ArgumentParser(description="Scaling benchmark of main.py --qnv")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick", help="cases to run")
+    parser.add_argument("--runs", type=int, default=3, help="number of runs of every case (the median time is kept)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds after which a run is abandoned")
+    parser.add_argument("--out", type=str, default="-", help="file to write the results to ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    results = list()
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, protocol, topology, n in cases(args.suite):
+            result = {"name": name, "protocol": protocol, "topology": topology, "n": n}
+            try:
+                result.update(run_case(workdir, protocol, topology, n, args.runs, args.timeout, extra))
+                print(f"{name:<24} {result['time']:>10.3f} s {result['peak_rss_kib']:>10} KiB "
+                      f"{result['configurations']:>10} configurations", file=sys.stderr)
+            except RuntimeError as e:
+                result["error"] = str(e)
+                print(f"{name:<24} error: {e}", file=sys.stderr)
+            results.append(result)
+
+    document = {
+        "meta": {
+            "commit": _commit(),
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "suite": args.suite,
+            "runs": args.runs,
+            "options": extra,
+        },
+        "results": results,
+    }
+    if args.out == "-":
+        json.dump(document, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.out, "w") as f:
+            json.dump(document, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Startup-time benchmark of `main.py`.
+
+Launches `main.py` repeatedly as a fresh process, the way scripts do, and reports the median and the best wall time
+of every scenario. With `--max-ms`, exits with status 1 if the median of any scenario exceeds that many
+milliseconds, so that it can guard against regressions.
+
+    python benchmarks/startup.py [--runs N] [--max-ms MS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAM = os.path.join(ROOT, "qnv-tests", "test1_pass.qnv")
+TOPOLOGY = os.path.join(ROOT, "qnv-tests", "test1.top")
+
+
+def scenarios(cache_dir: str) -> list[tuple[str, list[str]]]:
+    return [
+        ("help", ["--help"]),
+        ("parse", ["--parse", "--input", PROGRAM]),
+        ("parse (AST cache)", ["--parse", "--input", PROGRAM, "--ast-cache", cache_dir]),
+        ("qnv", ["--qnv", "--input", PROGRAM, "--topo", TOPOLOGY]),
+    ]
+
+
+def measure(args: list[str], runs: int) -> list[float]:
+    times = list()
+    for _ in range(0, runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, "main.py")] + args,
+                       cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark of main.py")
+    parser.add_argument("--runs", type=int, default=20, help="number of runs of every scenario")
+    parser.add_argument("--max-ms", type=float, default=0.0, help="fail if a median exceeds this many milliseconds")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print(f"{'scenario':<20} {'median ms':>10} {'best ms':>10}")
+        for name, argv in scenarios(cache_dir):
+            measure(argv, 1)  # warm the AST cache and the OS file cache
+            times = measure(argv, args.runs)
+            median = statistics.median(times) * 1000
+            print(f"{name:<20} {median:>10.1f} {min(times) * 1000:>10.1f}")
+            failed = failed or (args.max_ms > 0 and median > args.max_ms)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Module that caches parsed programs on disk.
+
+Every program is stored in its own file of a cache directory, named after a hash of its source text,
+so that scripts launching many runs on the same files skip the lexer and the parser altogether.
+This module deliberately imports neither of them: a run that hits the cache never builds them.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Optional
+
+from frontend.ast.tree import Program
+
+# bumped whenever the grammar or the AST nodes change, so that programs parsed by an older version are not reused
+FORMAT = 2
+
+
+def _path(cache_dir: str, code: str) -> str:
+    key = hashlib.sha256(f"{FORMAT}\0{code}".encode()).hexdigest()
+    return os.path.join(cache_dir, key + ".ast")
+
+
+def load(cache_dir: str, code: str) -> Optional[Program]:
+    """The program parsed from `code` if it is in the cache, `None` otherwise."""
+    try:
+        with open(_path(cache_dir, code), "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def save(cache_dir: str, code: str, program: Program) -> None:
+    """
+    Store the program parsed from `code`.
+    The file is written under a temporary name and then renamed, so that concurrent runs never read a partial file.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(program, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _path(cache_dir, code))
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -220,7 +220,7 @@ class Assertion(Statement):
         self.cond = cond
 
     def __getitem__(self, key: int) -> Node:
-        return (self.cond)[key]
+        return (self.cond,)[key]
 
     def __len__(self) -> int:
         return 1
@@ -277,7 +277,7 @@ class Forget(Statement):
         self.ident_list = ident_list
 
     def __getitem__(self, key: int) -> Node:
-        return (self.cond)[key]
+        return (self.ident_list,)[key]
 
     def __len__(self) -> int:
         return 1
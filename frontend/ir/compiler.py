@@ -0,0 +1,135 @@
+"""
+Module that compiles a `Program` AST into an `IRProgram`.
+"""
+
+from frontend.ast.tree import *
+from frontend.ast.visitor import Visitor
+
+from .instr import Instr, IRProgram, Opcode
+
+
+class Compiler(Visitor[None, int]):
+    """
+    Translates statements into instructions and expressions into the register holding their value.
+    Variable names are resolved to indices of `IRProgram.vars` at compile time.
+    """
+
+    def __init__(self) -> None:
+        self.code = list[Instr]()
+        self.vars = list[str]()
+        self.var_index = dict[str, int]()
+        self.nregs = 0
+        self.next_reg = 0
+        self.nloops = 0
+        self.lines = list()
+
+    def compile(self, program: Program) -> IRProgram:
+        program.accept(self, None)
+        return IRProgram(self.code, self.vars, self.nregs, self.nloops, self.lines)
+
+    def emit(self, opcode: Opcode, *operands) -> Instr:
+        instr = Instr(opcode, *operands)
+        self.code.append(instr)
+        return instr
+
+    def var(self, ident: Identifier) -> int:
+        index = self.var_index.get(ident.value)
+        if index is None:
+            index = len(self.vars)
+            self.vars.append(ident.value)
+            self.var_index[ident.value] = index
+        return index
+
+    def reg(self) -> int:
+        """
+        Allocate a temporary register.
+        Temporaries never outlive the statement that computes them, so registers are reused across statements.
+        """
+        self.next_reg = self.next_reg + 1
+        self.nregs = max(self.nregs, self.next_reg)
+        return self.next_reg - 1
+
+    def visitProgram(self, program: Program, ctx: None) -> None:
+        for stmt in program.children:
+            self.next_reg = 0
+            stmt.accept(self, ctx)
+
+    def visitIf(self, stmt: If, ctx: None) -> None:
+        cond = stmt.cond.accept(self, ctx)
+        branch = self.emit(Opcode.BRANCH, cond, None)
+        stmt.then.accept(self, ctx)
+        jump = self.emit(Opcode.JUMP, None)
+        branch.operands[1] = len(self.code)
+        stmt.otherwise.accept(self, ctx)
+        jump.operands[0] = len(self.code)
+
+    def visitWhile(self, stmt: While, ctx: None) -> None:
+        loop = self.nloops
+        self.nloops = self.nloops + 1
+        self.lines.append(stmt.getattr("lineno"))
+        self.emit(Opcode.LOOPINIT, loop)
+        target = len(self.code)
+        cond = stmt.cond.accept(self, ctx)
+        branch = self.emit(Opcode.BRANCH, cond, None)
+        stmt.body.accept(self, ctx)
+        self.emit(Opcode.LOOP, target, loop)
+        branch.operands[1] = len(self.code)
+
+    def visitAssignment(self, stmt: Assignment, ctx: None) -> None:
+        src = stmt.expr.accept(self, ctx)
+        self.emit(Opcode.STORE, self.var(stmt.ident), src)
+
+    def visitAssignmentCr(self, stmt: AssignmentCr, ctx: None) -> None:
+        x = stmt.expr1.accept(self, ctx)
+        y = stmt.expr2.accept(self, ctx)
+        self.emit(Opcode.CR, self.var(stmt.ident), x, y)
+
+    def visitAssignmentSw(self, stmt: AssignmentSw, ctx: None) -> None:
+        x = stmt.expr1.accept(self, ctx)
+        y = stmt.expr2.accept(self, ctx)
+        z = stmt.expr3.accept(self, ctx)
+        self.emit(Opcode.SW, self.var(stmt.ident), x, y, z)
+
+    def visitDe(self, stmt: De, ctx: None) -> None:
+        x = stmt.expr1.accept(self, ctx)
+        y = stmt.expr2.accept(self, ctx)
+        self.emit(Opcode.DE, x, y)
+
+    def visitAssertion(self, stmt: Assertion, ctx: None) -> None:
+        cond = stmt.cond.accept(self, ctx)
+        self.emit(Opcode.ASSERT, cond)
+
+    def visitPass(self, stmt: Pass, ctx: None) -> None:
+        pass
+
+    def visitForget(self, stmt: Forget, ctx: None) -> None:
+        self.emit(
+            Opcode.FORGET, tuple(self.var(ident) for ident in stmt.ident_list.children), not stmt.getattr("implicit")
+        )
+
+    def visitUnary(self, expr: Unary, ctx: None) -> int:
+        src = expr.operand.accept(self, ctx)
+        dst = self.reg()
+        self.emit(Opcode.UNARY, dst, expr.op, src)
+        return dst
+
+    def visitBinary(self, expr: Binary, ctx: None) -> int:
+        lhs = expr.lhs.accept(self, ctx)
+        rhs = expr.rhs.accept(self, ctx)
+        dst = self.reg()
+        self.emit(Opcode.BINARY, dst, expr.op, lhs, rhs)
+        return dst
+
+    def visitIdentifier(self, ident: Identifier, ctx: None) -> int:
+        dst = self.reg()
+        self.emit(Opcode.LOAD, dst, self.var(ident))
+        return dst
+
+    def visitIntLiteral(self, expr: IntLiteral, ctx: None) -> int:
+        dst = self.reg()
+        self.emit(Opcode.LOADI, dst, expr.value)
+        return dst
+
+
+def compile_program(program: Program) -> IRProgram:
+    return Compiler().compile(program)
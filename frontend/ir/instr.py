@@ -0,0 +1,93 @@
+"""
+Module that defines the flat, register-based intermediate representation (IR) of QNV programs.
+
+An `IRProgram` is a list of `Instr`. Operands are plain integers:
+`t<i>` denotes temporary register `i`, which holds the value of an expression for every configuration,
+and `v<i>` denotes program variable `IRProgram.vars[i]`. Control flow is expressed with jumps.
+The IR does not depend on the topology, so a compiled program can be saved and reused across runs.
+"""
+
+from __future__ import annotations
+
+import pickle
+from enum import IntEnum, unique
+
+from frontend.ast.node import Operator
+
+
+@unique
+class Opcode(IntEnum):
+    """
+    Enumerates all IR instructions along with their operands.
+    """
+
+    LOADI = 0  # dst, value         t[dst] = value
+    LOAD = 1  # dst, var            t[dst] = v[var]
+    UNARY = 2  # dst, op, src       t[dst] = op t[src]
+    BINARY = 3  # dst, op, lhs, rhs t[dst] = t[lhs] op t[rhs]
+    STORE = 4  # var, src           v[var] = t[src]
+    CR = 5  # var, x, y             v[var] = cr(t[x], t[y])
+    SW = 6  # var, x, y, z          v[var] = sw(t[x], t[y] @ t[z])
+    DE = 7  # x, y                  de(t[x], t[y])
+    ASSERT = 8  # cond              assert(t[cond])
+    FORGET = 9  # vars, strict      forget(v[var] for var in vars); undefined vars are an error if strict
+    BRANCH = 10  # cond, target     configurations where t[cond] == 0 jump to target
+    JUMP = 11  # target             all configurations jump forward to target
+    LOOPINIT = 12  # loop           entering loop `loop`: reset its iteration count
+    LOOP = 13  # target, loop       back edge of loop `loop`: jump back to target
+
+
+class Instr:
+    """
+    An IR instruction: an opcode followed by its operands.
+    """
+
+    __slots__ = ("opcode", "operands")
+
+    def __init__(self, opcode: Opcode, *operands) -> None:
+        self.opcode = opcode
+        self.operands = list(operands)
+
+    def __str__(self) -> str:
+        return "{} {}".format(
+            self.opcode.name,
+            ", ".join(op.value if isinstance(op, Operator) else str(op) for op in self.operands),
+        )
+
+
+class IRProgram:
+    """
+    A compiled QNV program.
+    `code`: the instruction list.
+    `vars`: names of program variables, indexed by the `var` operands.
+    `nregs`: number of temporary registers.
+    `nloops`: number of loops, indexed by the `loop` operands.
+    `lines`: source line of every loop, also indexed by the `loop` operands.
+    """
+
+    # bumped whenever instructions change, so that programs saved in an older format are not reused
+    FORMAT = 2
+
+    def __init__(self, code: list[Instr], vars: list[str], nregs: int, nloops: int, lines: list = ()) -> None:
+        self.code = code
+        self.vars = vars
+        self.nregs = nregs
+        self.nloops = nloops
+        self.lines = list(lines)
+
+    def save(self, path: str, key: str = "") -> None:
+        """Save the compiled program, tagged by `key` (e.g. a hash of its source)."""
+        with open(path, "wb") as f:
+            pickle.dump((key, self), f)
+
+    @staticmethod
+    def load(path: str, key: str = ""):
+        """Load a program saved by `save`. Returns `None` if `key` does not match."""
+        with open(path, "rb") as f:
+            saved_key, program = pickle.load(f)
+        return program if saved_key == key else None
+
+    def print(self) -> None:
+        print("vars: " + ", ".join(f"v{i}={name}" for i, name in enumerate(self.vars)))
+        for pc, instr in enumerate(self.code):
+            print(f"{pc:5}: {instr}")
@@ -0,0 +1,11 @@
+# lextab.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('And', 'Assert', 'Assign', 'At', 'Comma', 'Cr', 'De', 'Div', 'Else', 'Equal', 'Forget', 'Greater', 'GreaterEqual', 'Identifier', 'If', 'Integer', 'LBrace', 'LParen', 'Less', 'LessEqual', 'Minus', 'Mul', 'Not', 'NotEqual', 'Or', 'Pass', 'Plus', 'RBrace', 'RParen', 'Semi', 'Sw', 'While'))
+_lexreflags   = 64
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive', 'multiline': 'exclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_multiline>/\\*)|(?P<t_ANY_Newline>(?:\\r\\n?|\\n))|(?P<t_Identifier>[a-zA-Z_][0-9a-zA-Z_]*)|(?P<t_Integer>[0-9]+)|(?P<t_ignore_LineComment>//.*?(?=(?:\\r\\n?|\\n)))|(?P<t_ignore_Newline>(?:\\r\\n?|\\n))|(?P<t_Assert>t_Assert)|(?P<t_Forget>t_Forget)|(?P<t_While>t_While)|(?P<t_Else>t_Else)|(?P<t_Pass>t_Pass)|(?P<t_ignore_Whitespace>[ \\t]+)|(?P<t_And>\\&\\&)|(?P<t_Cr>t_Cr)|(?P<t_De>t_De)|(?P<t_If>t_If)|(?P<t_Or>\\|\\|)|(?P<t_Sw>t_Sw)|(?P<t_Equal>==)|(?P<t_GreaterEqual>>=)|(?P<t_LBrace>\\{)|(?P<t_LParen>\\()|(?P<t_LessEqual><=)|(?P<t_Minus>\\-)|(?P<t_Mul>\\*)|(?P<t_NotEqual>!=)|(?P<t_Plus>\\+)|(?P<t_RBrace>\\})|(?P<t_RParen>\\))|(?P<t_Assign>=)|(?P<t_At>@)|(?P<t_Comma>,)|(?P<t_Div>/)|(?P<t_Greater>>)|(?P<t_Less><)|(?P<t_Not>!)|(?P<t_Semi>;)', [None, ('t_multiline', 'multiline'), ('t_ANY_Newline', 'Newline'), ('t_Identifier', 'Identifier'), ('t_Integer', 'Integer'), (None, None), (None, None), (None, 'Assert'), (None, 'Forget'), (None, 'While'), (None, 'Else'), (None, 'Pass'), (None, None), (None, 'And'), (None, 'Cr'), (None, 'De'), (None, 'If'), (None, 'Or'), (None, 'Sw'), (None, 'Equal'), (None, 'GreaterEqual'), (None, 'LBrace'), (None, 'LParen'), (None, 'LessEqual'), (None, 'Minus'), (None, 'Mul'), (None, 'NotEqual'), (None, 'Plus'), (None, 'RBrace'), (None, 'RParen'), (None, 'Assign'), (None, 'At'), (None, 'Comma'), (None, 'Div'), (None, 'Greater'), (None, 'Less'), (None, 'Not'), (None, 'Semi')])], 'multiline': [('(?P<t_multiline_end>\\*/)|(?P<t_ANY_Newline>(?:\\r\\n?|\\n))|(?P<t_multiline_ignore_all>.+?(?=\\*/|(?:\\r\\n?|\\n)))', [None, ('t_multiline_end', 'end'), ('t_ANY_Newline', 'Newline'), (None, None)])]}
+_lexstateignore = {'INITIAL': ''}
+_lexstateerrorf = {'INITIAL': 't_ANY_error', 'multiline': 't_ANY_error'}
+_lexstateeoff = {}
+_signature    = 'f2a5cce0'
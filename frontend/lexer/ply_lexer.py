@@ -3,6 +3,9 @@ Module that defines a lexer using `ply.lex`.
 It won't make your experiment harder if you don't read it.
 """
 
+import os
+import sys
+import zlib
 from functools import wraps
 from typing import List
 
@@ -67,5 +70,40 @@ def _intlit_into_node(f):
 
 t_Integer = _intlit_into_node(t_Integer)
 
-lexer = lex.lex()
+
+def _signature() -> str:
+    """Digest of the lexing rules, which `lextab.py` must have been generated from."""
+    rules = [
+        (name, value if isinstance(value, str) else value.__doc__)
+        for name, value in globals().items()
+        if name.startswith("t_")
+    ]
+    return f"{zlib.crc32(repr((states, tokens, rules)).encode()):08x}"
+
+
+def _lexer():
+    """
+    The lexer, loaded from the table precomputed in `lextab.py` instead of being built from the rules.
+    Unlike yacc, lex does not check that the table matches the rules: if they changed since it was generated,
+    the lexer is built from the rules in memory on every run; regenerate the table with `write_tables`.
+    """
+    try:
+        from . import lextab
+
+        if getattr(lextab, "_signature", None) == _signature():
+            return lex.lex(module=sys.modules[__name__], optimize=True, lextab="frontend.lexer.lextab")
+    except ImportError:
+        pass
+    return lex.lex(module=sys.modules[__name__])
+
+
+lexer = _lexer()
 lexer.error_stack = error_stack  # type: ignore
+
+
+def write_tables() -> None:
+    """Regenerate `lextab.py` next to this module: `python -c "from frontend.lexer.ply_lexer import write_tables; write_tables()"`."""
+    outputdir = os.path.dirname(os.path.abspath(__file__))
+    lex.lex(module=sys.modules[__name__]).writetab("lextab", outputdir)
+    with open(os.path.join(outputdir, "lextab.py"), "a") as f:
+        f.write(f"_signature    = {_signature()!r}\n")
@@ -0,0 +1,78 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'programAnd Assert Assign At Comma Cr De Div Else Equal Forget Greater GreaterEqual Identifier If Integer LBrace LParen Less LessEqual Minus Mul Not NotEqual Or Pass Plus RBrace RParen Semi Sw While\n    empty :\n    \n    program : program statement\n    \n    program : empty\n    \n    statement : assignment\n        | assignment_cr\n        | assignment_sw\n        | de_statement\n        | assertion\n        | pass_statement\n        | forget_statement\n    \n    statement : If LParen test RParen LBrace program RBrace Else LBrace program RBrace\n    \n    statement : While LParen test RParen LBrace program RBrace\n    \n    assignment : Identifier Assign expression Semi\n    \n    assignment_cr : Identifier Assign Cr LParen expression Comma expression RParen Semi\n    \n    assignment_sw : Identifier Assign Sw LParen expression Comma expression At expression RParen Semi\n    \n    de_statement : De LParen expression Comma expression RParen Semi\n    \n    assertion : Assert LParen test RParen Semi\n    \n    pass_statement : Pass Semi\n    \n    IdentifierList : Identifier IdentifierListCommaAhead\n    \n    IdentifierListCommaAhead : Comma Identifier IdentifierListCommaAhead\n    \n    IdentifierList : empty\n    \n    IdentifierListCommaAhead : empty\n    \n    forget_statement : Forget LParen IdentifierList RParen Semi\n    \n    expression : additive\n    additive : multiplicative\n    multiplicative : unary\n    unary : postfix\n    postfix : primary\n    \n    unary : Minus unary\n    \n    additive : additive Plus multiplicative\n        | additive Minus multiplicative\n    multiplicative : multiplicative Mul unary\n        | multiplicative Div unary\n    \n    primary : Integer\n    \n    primary : Identifier\n    \n    primary : LParen expression RParen\n    \n    test : logical_or\n    logical_or : logical_and\n    logical_and : relational\n    \n    relational : Not relational\n    \n    logical_or : logical_or Or logical_and\n    logical_and : logical_and And relational\n    relational : expression NotEqual expression\n        | expression Equal expression\n        | expression Less expression\n        | expression Greater expression\n        | expression LessEqual expression\n        | expression GreaterEqual expression\n    '
+    
+_lr_action_items = {'If':([0,1,2,3,4,5,6,7,8,9,10,23,66,76,89,93,94,96,97,103,106,110,111,113,115,116,],[-1,11,-3,-2,-4,-5,-6,-7,-8,-9,-10,-18,-13,-1,-1,-17,-23,11,11,-12,-16,-1,-14,11,-11,-15,]),'While':([0,1,2,3,4,5,6,7,8,9,10,23,66,76,89,93,94,96,97,103,106,110,111,113,115,116,],[-1,12,-3,-2,-4,-5,-6,-7,-8,-9,-10,-18,-13,-1,-1,-17,-23,12,12,-12,-16,-1,-14,12,-11,-15,]),'Identifier':([0,1,2,3,4,5,6,7,8,9,10,18,19,20,21,22,23,24,25,30,34,51,52,54,55,56,57,58,59,60,61,62,63,66,67,68,69,73,76,89,93,94,96,97,98,99,103,106,109,110,111,113,115,116,],[-1,13,-3,-2,-4,-5,-6,-7,-8,-9,-10,39,39,39,39,39,-18,47,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,-13,39,39,39,95,-1,-1,-17,-23,13,13,39,39,-12,-16,39,-1,-14,13,-11,-15,]),'De':([0,1,2,3,4,5,6,7,8,9,10,23,66,76,89,93,94,96,97,103,106,110,111,113,115,116,],[-1,14,-3,-2,-4,-5,-6,-7,-8,-9,-10,-18,-13,-1,-1,-17,-23,14,14,-12,-16,-1,-14,14,-11,-15,]),'Assert':([0,1,2,3,4,5,6,7,8,9,10,23,66,76,89,93,94,96,97,103,106,110,111,113,115,116,],[-1,15,-3,-2,-4,-5,-6,-7,-8,-9,-10,-18,-13,-1,-1,-17,-23,15,15,-12,-16,-1,-14,15,-11,-15,]),'Pass':([0,1,2,3,4,5,6,7,8,9,10,23,66,76,89,93,94,96,97,103,106,110,111,113,115,116,],[-1,16,-3,-2,-4,-5,-6,-7,-8,-9,-10,-18,-13,-1,-1,-17,-23,16,16,-12,-16,-1,-14,16,-11,-15,]),'Forget':([0,1,2,3,4,5,6,7,8,9,10,23,66,76,89,93,94,96,97,103,106,110,111,113,115,116,],[-1,17,-3,-2,-4,-5,-6,-7,-8,-9,-10,-18,-13,-1,-1,-17,-23,17,17,-12,-16,-1,-14,17,-11,-15,]),'$end':([0,1,2,3,4,5,6,7,8,9,10,23,66,93,94,103,106,111,115,116,],[-1,0,-3,-2,-4,-5,-6,-7,-8,-9,-10,-18,-13,-17,-23,-12,-16,-14,-11,-15,]),'RBrace':([2,3,4,5,6,7,8,9,10,23,66,76,89,93,94,96,97,103,106,110,111,113,115,116,],[-3,-2,-4,-5,-6,-7,-8,-9,-10,-18,-13,-1,-1,-17,-23,102,103,-12,-16,-1,-14,115,-11,-15,]),'LParen':([11,12,14,15,17,18,19,20,21,22,25,30,34,42,43,51,52,54,55,56,57,58,59,60,61,62,63,67,68,69,98,99,109,],[18,19,21,22,24,25,25,25,25,25,25,25,25,67,68,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,]),'Assign':([13,],[20,]),'Semi':([16,32,33,35,36,37,38,39,41,64,70,71,75,85,86,87,88,100,108,114,],[23,-24,-25,-26,-27,-28,-34,-35,66,-29,93,94,-36,-30,-31,-32,-33,106,111,116,]),'Not':([18,19,22,30,51,52,],[30,30,30,30,30,30,]),'Minus':([18,19,20,21,22,25,30,32,33,34,35,36,37,38,39,51,52,54,55,56,57,58,59,60,61,62,63,64,67,68,69,75,85,86,87,88,98,99,109,],[34,34,34,34,34,34,34,61,-25,34,-26,-27,-28,-34,-35,34,34,34,34,34,34,34,34,34,34,34,34,-29,34,34,34,-36,-30,-31,-32,-33,34,34,34,]),'Integer':([18,19,20,21,22,25,30,34,51,52,54,55,56,57,58,59,60,61,62,63,67,68,69,98,99,109,],[38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,]),'Cr':([20,],[42,]),'Sw':([20,],[43,]),'RParen':([24,26,27,28,29,32,33,35,36,37,38,39,40,45,46,47,48,49,53,64,72,74,75,77,78,79,80,81,82,83,84,85,86,87,88,92,95,101,104,112,],[-1,50,-37,-38,-39,-24,-25,-26,-27,-28,-34,-35,65,70,71,-1,-21,75,-40,-29,-19,-22,-36,-41,-42,-43,-44,-45,-46,-47,-48,-30,-31,-32,-33,100,-1,-20,108,114,]),'Or':([27,28,29,32,33,35,36,37,38,39,53,64,75,77,78,79,80,81,82,83,84,85,86,87,88,],[51,-38,-39,-24,-25,-26,-27,-28,-34,-35,-40,-29,-36,-41,-42,-43,-44,-45,-46,-47,-48,-30,-31,-32,-33,]),'And':([28,29,32,33,35,36,37,38,39,53,64,75,77,78,79,80,81,82,83,84,85,86,87,88,],[52,-39,-24,-25,-26,-27,-28,-34,-35,-40,-29,-36,52,-42,-43,-44,-45,-46,-47,-48,-30,-31,-32,-33,]),'NotEqual':([31,32,33,35,36,37,38,39,64,75,85,86,87,88,],[54,-24,-25,-26,-27,-28,-34,-35,-29,-36,-30,-31,-32,-33,]),'Equal':([31,32,33,35,36,37,38,39,64,75,85,86,87,88,],[55,-24,-25,-26,-27,-28,-34,-35,-29,-36,-30,-31,-32,-33,]),'Less':([31,32,33,35,36,37,38,39,64,75,85,86,87,88,],[56,-24,-25,-26,-27,-28,-34,-35,-29,-36,-30,-31,-32,-33,]),'Greater':([31,32,33,35,36,37,38,39,64,75,85,86,87,88,],[57,-24,-25,-26,-27,-28,-34,-35,-29,-36,-30,-31,-32,-33,]),'LessEqual':([31,32,33,35,36,37,38,39,64,75,85,86,87,88,],[58,-24,-25,-26,-27,-28,-34,-35,-29,-36,-30,-31,-32,-33,]),'GreaterEqual':([31,32,33,35,36,37,38,39,64,75,85,86,87,88,],[59,-24,-25,-26,-27,-28,-34,-35,-29,-36,-30,-31,-32,-33,]),'Comma':([32,33,35,36,37,38,39,44,47,64,75,85,86,87,88,90,91,95,],[-24,-25,-26,-27,-28,-34,-35,69,73,-29,-36,-30,-31,-32,-33,98,99,73,]),'At':([32,33,35,36,37,38,39,64,75,85,86,87,88,105,],[-24,-25,-26,-27,-28,-34,-35,-29,-36,-30,-31,-32,-33,109,]),'Plus':([32,33,35,36,37,38,39,64,75,85,86,87,88,],[60,-25,-26,-27,-28,-34,-35,-29,-36,-30,-31,-32,-33,]),'Mul':([33,35,36,37,38,39,64,75,85,86,87,88,],[62,-26,-27,-28,-34,-35,-29,-36,62,62,-32,-33,]),'Div':([33,35,36,37,38,39,64,75,85,86,87,88,],[63,-26,-27,-28,-34,-35,-29,-36,63,63,-32,-33,]),'LBrace':([50,65,107,],[76,89,110,]),'Else':([102,],[107,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'program':([0,76,89,110,],[1,96,97,113,]),'empty':([0,24,47,76,89,95,110,],[2,48,74,2,2,74,2,]),'statement':([1,96,97,113,],[3,3,3,3,]),'assignment':([1,96,97,113,],[4,4,4,4,]),'assignment_cr':([1,96,97,113,],[5,5,5,5,]),'assignment_sw':([1,96,97,113,],[6,6,6,6,]),'de_statement':([1,96,97,113,],[7,7,7,7,]),'assertion':([1,96,97,113,],[8,8,8,8,]),'pass_statement':([1,96,97,113,],[9,9,9,9,]),'forget_statement':([1,96,97,113,],[10,10,10,10,]),'test':([18,19,22,],[26,40,45,]),'logical_or':([18,19,22,],[27,27,27,]),'logical_and':([18,19,22,51,],[28,28,28,77,]),'relational':([18,19,22,30,51,52,],[29,29,29,53,29,78,]),'expression':([18,19,20,21,22,25,30,51,52,54,55,56,57,58,59,67,68,69,98,99,109,],[31,31,41,44,31,49,31,31,31,79,80,81,82,83,84,90,91,92,104,105,112,]),'additive':([18,19,20,21,22,25,30,51,52,54,55,56,57,58,59,67,68,69,98,99,109,],[32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,]),'multiplicative':([18,19,20,21,22,25,30,51,52,54,55,56,57,58,59,60,61,67,68,69,98,99,109,],[33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,85,86,33,33,33,33,33,33,]),'unary':([18,19,20,21,22,25,30,34,51,52,54,55,56,57,58,59,60,61,62,63,67,68,69,98,99,109,],[35,35,35,35,35,35,35,64,35,35,35,35,35,35,35,35,35,35,87,88,35,35,35,35,35,35,]),'postfix':([18,19,20,21,22,25,30,34,51,52,54,55,56,57,58,59,60,61,62,63,67,68,69,98,99,109,],[36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,]),'primary':([18,19,20,21,22,25,30,34,51,52,54,55,56,57,58,59,60,61,62,63,67,68,69,98,99,109,],[37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,]),'IdentifierList':([24,],[46,]),'IdentifierListCommaAhead':([47,95,],[72,101,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> program","S'",1,None,None,None),
+  ('empty -> <empty>','empty',0,'p_empty','ply_parser.py',39),
+  ('program -> program statement','program',2,'p_program','ply_parser.py',46),
+  ('program -> empty','program',1,'p_program_empty','ply_parser.py',55),
+  ('statement -> assignment','statement',1,'p_statement','ply_parser.py',62),
+  ('statement -> assignment_cr','statement',1,'p_statement','ply_parser.py',63),
+  ('statement -> assignment_sw','statement',1,'p_statement','ply_parser.py',64),
+  ('statement -> de_statement','statement',1,'p_statement','ply_parser.py',65),
+  ('statement -> assertion','statement',1,'p_statement','ply_parser.py',66),
+  ('statement -> pass_statement','statement',1,'p_statement','ply_parser.py',67),
+  ('statement -> forget_statement','statement',1,'p_statement','ply_parser.py',68),
+  ('statement -> If LParen test RParen LBrace program RBrace Else LBrace program RBrace','statement',11,'p_if_else','ply_parser.py',75),
+  ('statement -> While LParen test RParen LBrace program RBrace','statement',7,'p_while','ply_parser.py',83),
+  ('assignment -> Identifier Assign expression Semi','assignment',4,'p_assignment','ply_parser.py',91),
+  ('assignment_cr -> Identifier Assign Cr LParen expression Comma expression RParen Semi','assignment_cr',9,'p_assignment_cr','ply_parser.py',99),
+  ('assignment_sw -> Identifier Assign Sw LParen expression Comma expression At expression RParen Semi','assignment_sw',11,'p_assignment_sw','ply_parser.py',107),
+  ('de_statement -> De LParen expression Comma expression RParen Semi','de_statement',7,'p_de_statement','ply_parser.py',115),
+  ('assertion -> Assert LParen test RParen Semi','assertion',5,'p_assertion','ply_parser.py',123),
+  ('pass_statement -> Pass Semi','pass_statement',2,'p_pass','ply_parser.py',131),
+  ('IdentifierList -> Identifier IdentifierListCommaAhead','IdentifierList',2,'p_identifier_list','ply_parser.py',139),
+  ('IdentifierListCommaAhead -> Comma Identifier IdentifierListCommaAhead','IdentifierListCommaAhead',3,'p_identifier_list_comma_ahead','ply_parser.py',148),
+  ('IdentifierList -> empty','IdentifierList',1,'p_identifier_list_empty','ply_parser.py',157),
+  ('IdentifierListCommaAhead -> empty','IdentifierListCommaAhead',1,'p_identifier_list_comma_ahead_empty','ply_parser.py',164),
+  ('forget_statement -> Forget LParen IdentifierList RParen Semi','forget_statement',5,'p_forget','ply_parser.py',171),
+  ('expression -> additive','expression',1,'p_expression_precedence','ply_parser.py',179),
+  ('additive -> multiplicative','additive',1,'p_expression_precedence','ply_parser.py',180),
+  ('multiplicative -> unary','multiplicative',1,'p_expression_precedence','ply_parser.py',181),
+  ('unary -> postfix','unary',1,'p_expression_precedence','ply_parser.py',182),
+  ('postfix -> primary','postfix',1,'p_expression_precedence','ply_parser.py',183),
+  ('unary -> Minus unary','unary',2,'p_unary_expression','ply_parser.py',190),
+  ('additive -> additive Plus multiplicative','additive',3,'p_binary_expression','ply_parser.py',197),
+  ('additive -> additive Minus multiplicative','additive',3,'p_binary_expression','ply_parser.py',198),
+  ('multiplicative -> multiplicative Mul unary','multiplicative',3,'p_binary_expression','ply_parser.py',199),
+  ('multiplicative -> multiplicative Div unary','multiplicative',3,'p_binary_expression','ply_parser.py',200),
+  ('primary -> Integer','primary',1,'p_int_literal_expression','ply_parser.py',207),
+  ('primary -> Identifier','primary',1,'p_identifier_expression','ply_parser.py',214),
+  ('primary -> LParen expression RParen','primary',3,'p_brace_expression','ply_parser.py',221),
+  ('test -> logical_or','test',1,'p_test_precedence','ply_parser.py',228),
+  ('logical_or -> logical_and','logical_or',1,'p_test_precedence','ply_parser.py',229),
+  ('logical_and -> relational','logical_and',1,'p_test_precedence','ply_parser.py',230),
+  ('relational -> Not relational','relational',2,'p_unary_test','ply_parser.py',237),
+  ('logical_or -> logical_or Or logical_and','logical_or',3,'p_binary_test','ply_parser.py',244),
+  ('logical_and -> logical_and And relational','logical_and',3,'p_binary_test','ply_parser.py',245),
+  ('relational -> expression NotEqual expression','relational',3,'p_binary_test','ply_parser.py',246),
+  ('relational -> expression Equal expression','relational',3,'p_binary_test','ply_parser.py',247),
+  ('relational -> expression Less expression','relational',3,'p_binary_test','ply_parser.py',248),
+  ('relational -> expression Greater expression','relational',3,'p_binary_test','ply_parser.py',249),
+  ('relational -> expression LessEqual expression','relational',3,'p_binary_test','ply_parser.py',250),
+  ('relational -> expression GreaterEqual expression','relational',3,'p_binary_test','ply_parser.py',251),
+]
@@ -10,6 +10,8 @@ Add your own parser rules on demand, which can be accomplished by:
 Refer to https://www.dabeaz.com/ply/ply.html for more details.
 """
 
+import os
+import sys
 
 import ply.yacc as yacc
 
@@ -73,6 +75,7 @@ def p_if_else(p):
     statement : If LParen test RParen LBrace program RBrace Else LBrace program RBrace
     """
     p[0] = If(p[3], p[6], p[10])
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_while(p):
@@ -80,6 +83,7 @@ def p_while(p):
     statement : While LParen test RParen LBrace program RBrace
     """
     p[0] = While(p[3], p[6])
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_assignment(p):
@@ -87,6 +91,7 @@ def p_assignment(p):
     assignment : Identifier Assign expression Semi
     """
     p[0] = Assignment(p[1], p[3])
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_assignment_cr(p):
@@ -94,6 +99,7 @@ def p_assignment_cr(p):
     assignment_cr : Identifier Assign Cr LParen expression Comma expression RParen Semi
     """
     p[0] = AssignmentCr(p[1], p[5], p[7])
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_assignment_sw(p):
@@ -101,6 +107,7 @@ def p_assignment_sw(p):
     assignment_sw : Identifier Assign Sw LParen expression Comma expression At expression RParen Semi
     """
     p[0] = AssignmentSw(p[1], p[5], p[7], p[9])
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_de_statement(p):
@@ -108,6 +115,7 @@ def p_de_statement(p):
     de_statement : De LParen expression Comma expression RParen Semi
     """
     p[0] = De(p[3], p[5])
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_assertion(p):
@@ -115,6 +123,7 @@ def p_assertion(p):
     assertion : Assert LParen test RParen Semi
     """
     p[0] = Assertion(p[3])
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_pass(p):
@@ -122,6 +131,7 @@ def p_pass(p):
     pass_statement : Pass Semi
     """
     p[0] = Pass()
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_identifier_list(p):
@@ -161,6 +171,7 @@ def p_forget(p):
     forget_statement : Forget LParen IdentifierList RParen Semi
     """
     p[0] = Forget(p[3])
+    p[0].setattr("lineno", p.lineno(1))
 
 
 def p_expression_precedence(p):
@@ -257,5 +268,18 @@ def p_error(t):
     return parser.token()
 
 
-parser = yacc.yacc(start="program")
+# The tables are precomputed in `parsetab.py` and loaded read-only: yacc neither writes tables nor `parser.out`.
+# If the grammar changes, yacc notices that the tables are stale and rebuilds them in memory on every run;
+# regenerate them with `write_tables`.
+parser = yacc.yacc(start="program", debug=False, write_tables=False, tabmodule="frontend.parser.parsetab")
 parser.error_stack = error_stack  # type: ignore
+
+
+def write_tables() -> None:
+    """Regenerate `parsetab.py` next to this module: `python -c "from frontend.parser.ply_parser import write_tables; write_tables()"`."""
+    outputdir = os.path.dirname(os.path.abspath(__file__))
+    # yacc only writes tables that it fails to load, so the current ones are removed first
+    sys.modules.pop("frontend.parser.parsetab", None)
+    if os.path.exists(os.path.join(outputdir, "parsetab.py")):
+        os.remove(os.path.join(outputdir, "parsetab.py"))
+    yacc.yacc(module=sys.modules[__name__], start="program", debug=False, tabmodule="parsetab", outputdir=outputdir)
@@ -0,0 +1,187 @@
+"""
+Module that implements a backward liveness analysis over QNV programs.
+
+A variable is live at a program point if its current value may still be observed, i.e.
+it may be read by an expression or a `forget` later on, or it may appear in the final result.
+"""
+
+from frontend.ast.tree import *
+
+
+def uses(expr: Expression) -> set[str]:
+    """Variables read by an expression."""
+    if isinstance(expr, Identifier):
+        return {expr.value}
+    if isinstance(expr, Unary):
+        return uses(expr.operand)
+    if isinstance(expr, Binary):
+        return uses(expr.lhs) | uses(expr.rhs)
+    return set()
+
+
+def variables(node: Node) -> set[str]:
+    """All variables mentioned in a program or a statement."""
+    if isinstance(node, Identifier):
+        return {node.value}
+    ret = set()
+    for child in node:
+        ret |= variables(child)
+    return ret
+
+
+def defs(node: Node) -> set[str]:
+    """Variables that a program or a statement may assign or forget."""
+    if isinstance(node, (Assignment, AssignmentCr, AssignmentSw)):
+        return {node.ident.value}
+    if isinstance(node, Forget):
+        return {ident.value for ident in node.ident_list.children}
+    if isinstance(node, If):
+        return defs(node.then) | defs(node.otherwise)
+    if isinstance(node, While):
+        return defs(node.body)
+    if isinstance(node, Program):
+        return set().union(*map(defs, node.children))
+    return set()
+
+
+class Liveness:
+    """
+    Backward liveness analysis.
+    `block` and `stmt` compute the variables live before a block (or a statement) given those live after it,
+    and return them alongside the block (or statement) itself.
+    If `prune` is set, assignments to dead variables are removed on the way.
+    """
+
+    def __init__(self, prune: bool = False) -> None:
+        self.prune = prune
+
+    def block(self, program: Program, live_out: set[str]) -> tuple[Program, set[str]]:
+        live = set(live_out)
+        stmts = list()
+        for stmt in reversed(program.children):
+            stmt, live = self.stmt(stmt, live)
+            if stmt is not None:
+                stmts.append(stmt)
+        stmts.reverse()
+        return Program(*stmts), live
+
+    def stmt(self, stmt: Statement, live_out: set[str]) -> tuple[Optional[Statement], set[str]]:
+        if isinstance(stmt, Assignment):
+            if self.prune and stmt.ident.value not in live_out:
+                return None, live_out
+            return stmt, (live_out - {stmt.ident.value}) | uses(stmt.expr)
+        if isinstance(stmt, AssignmentCr):
+            return stmt, (live_out - {stmt.ident.value}) | uses(stmt.expr1) | uses(stmt.expr2)
+        if isinstance(stmt, AssignmentSw):
+            return stmt, (live_out - {stmt.ident.value}) | uses(stmt.expr1) | uses(stmt.expr2) | uses(stmt.expr3)
+        if isinstance(stmt, De):
+            return stmt, live_out | uses(stmt.expr1) | uses(stmt.expr2)
+        if isinstance(stmt, Assertion):
+            return stmt, live_out | uses(stmt.cond)
+        if isinstance(stmt, Forget):
+            # `forget` requires its variables to be defined, so it counts as a use.
+            return stmt, live_out | {ident.value for ident in stmt.ident_list.children}
+        if isinstance(stmt, If):
+            then, live_then = self.block(stmt.then, live_out)
+            otherwise, live_else = self.block(stmt.otherwise, live_out)
+            branch = If(stmt.cond, then, otherwise)
+            branch.setattr("lineno", stmt.getattr("lineno"))
+            return branch, live_then | live_else | uses(stmt.cond)
+        if isinstance(stmt, While):
+            live = live_out | uses(stmt.cond)
+            while True:
+                body, live_body = self.block(stmt.body, live)
+                new_live = live | live_body
+                if new_live == live:
+                    break
+                live = new_live
+            loop = While(stmt.cond, body)
+            loop.setattr("lineno", stmt.getattr("lineno"))
+            return loop, live
+        return stmt, live_out
+
+    def live_in(self, program: Program, live_out: set[str]) -> set[str]:
+        return self.block(program, live_out)[1]
+
+
+def _assigned(stmt: Statement) -> set[str]:
+    if isinstance(stmt, (Assignment, AssignmentCr, AssignmentSw)):
+        return {stmt.ident.value}
+    return set()
+
+
+class AutoForget(Liveness):
+    """
+    Inserts an implicit `forget` right after every statement where variables die,
+    i.e. where they are read for the last time or assigned a value that is never read.
+    Configurations that only differ in dead variables then merge as soon as these are forgotten.
+
+    Variables that die in the condition of an `if`, i.e. are dead at the start of both its branches,
+    are forgotten at the start of each branch rather than after the whole `if`.
+
+    Implicit forgets are marked with the `implicit` attribute. A variable may be undefined in some
+    configurations when it dies (e.g. if only one branch of an `if` assigned it),
+    so the analysis ignores the variables of an implicit forget that are not defined.
+    """
+
+    def block(self, program: Program, live_out: set[str]) -> tuple[Program, set[str]]:
+        live = set(live_out)
+        stmts = list()
+        for stmt in reversed(program.children):
+            new_stmt, live_before = self.stmt(stmt, live)
+            dead = (live_before | _assigned(stmt)) - live - _forgotten_at_head(new_stmt)
+            if dead:
+                stmts.append(implicit_forget(dead))
+                stmts[-1].setattr("lineno", stmt.getattr("lineno"))
+            stmts.append(new_stmt)
+            live = live_before
+        stmts.reverse()
+        return Program(*stmts), live
+
+    def stmt(self, stmt: Statement, live_out: set[str]) -> tuple[Optional[Statement], set[str]]:
+        if isinstance(stmt, If):
+            then, live_then = self.block(stmt.then, live_out)
+            otherwise, live_else = self.block(stmt.otherwise, live_out)
+            dead = uses(stmt.cond) - live_then - live_else
+            if dead:
+                then = Program(implicit_forget(dead), *then.children)
+                otherwise = Program(implicit_forget(dead), *otherwise.children)
+                then.children[0].setattr("lineno", stmt.getattr("lineno"))
+                otherwise.children[0].setattr("lineno", stmt.getattr("lineno"))
+            branch = If(stmt.cond, then, otherwise)
+            branch.setattr("lineno", stmt.getattr("lineno"))
+            return branch, live_then | live_else | uses(stmt.cond)
+        return super().stmt(stmt, live_out)
+
+
+def _forgotten_at_head(stmt: Statement) -> set[str]:
+    """Variables that an `if` rewritten by `AutoForget` forgets at the start of its branches."""
+    if isinstance(stmt, If) and len(stmt.then.children) > 0:
+        head = stmt.then.children[0]
+        if isinstance(head, Forget) and head.getattr("implicit"):
+            return {ident.value for ident in head.ident_list.children}
+    return set()
+
+
+def implicit_forget(idents: set[str]) -> Forget:
+    stmt = Forget(IdentifierList(*(Identifier(ident) for ident in sorted(idents))))
+    stmt.setattr("implicit", True)
+    return stmt
+
+
+def insert_forgets(program: Program, keep: Optional[set[str]] = None) -> Program:
+    """
+    Forget every variable as soon as it is dead.
+    Only the variables in `keep` are observed at the end of the program, so the others do not show up in the result.
+    """
+    return AutoForget().block(program, set(keep or ()))[0]
+
+
+def eliminate_dead_assignments(program: Program, live_out: Optional[set[str]] = None) -> Program:
+    """
+    Remove assignments whose value is never observed.
+    By default every variable is observed at the end of the program, since it shows up in the result.
+    """
+    if live_out is None:
+        live_out = variables(program)
+    return Liveness(prune=True).block(program, live_out)[0]
@@ -0,0 +1,189 @@
+"""
+Module that implements a static optimizer over QNV programs.
+
+Most of a protocol is deterministic bookkeeping (loop counters, node indices) whose value is the same
+in every configuration. The optimizer evaluates it at compile time, so that the analysis only sees
+the statements that really depend on the probabilistic state:
+
+1. Constant propagation and folding.
+2. Branch selection for `if` statements and full unrolling of `while` loops whose condition is constant,
+    as long as the loop bound of the analysis would not cut them.
+3. Folding of `cr(x, y)` with constant endpoints against the topology:
+    a link with zero success probability always fails, so the statement becomes `ident = 0`.
+4. Elimination of dead assignments.
+"""
+
+from typing import Optional
+
+from frontend.ast.tree import *
+from frontend.qnv.bounds import LoopBound
+from frontend.qnv.operators import binary, unary
+from frontend.qnv.topology import Topology
+
+from .liveness import defs, eliminate_dead_assignments
+
+
+class Optimizer:
+    """
+    `env` maps the variables whose value is known at a program point to that value.
+    `max_unroll` bounds the number of iterations of a single loop that may be unrolled,
+    and `max_stmts` bounds the number of statements produced by unrolling it.
+    A loop that runs more iterations than `bound` allows it is kept too, so that the analysis cuts it as it would
+    without the optimizer. Loops exceeding any bound are kept as they are.
+    """
+
+    def __init__(
+        self,
+        topo: Optional[Topology] = None,
+        max_unroll: int = 1000,
+        max_stmts: int = 100000,
+        bound: Optional[LoopBound] = None,
+    ) -> None:
+        self.topo = topo
+        self.max_unroll = max_unroll
+        self.max_stmts = max_stmts
+        self.bound = bound if bound is not None else LoopBound()
+
+    def optimize(self, program: Program) -> Program:
+        return eliminate_dead_assignments(Program(*self.block(program, dict())))
+
+    def fold(self, expr: Expression, env: dict) -> Expression:
+        if isinstance(expr, Identifier):
+            if expr.value in env:
+                return IntLiteral(env[expr.value])
+            return expr
+        if isinstance(expr, Unary):
+            operand = self.fold(expr.operand, env)
+            if isinstance(operand, IntLiteral):
+                return IntLiteral(int(unary(expr.op, operand.value)))
+            return Unary(expr.op, operand)
+        if isinstance(expr, Binary):
+            lhs = self.fold(expr.lhs, env)
+            rhs = self.fold(expr.rhs, env)
+            if isinstance(lhs, IntLiteral) and isinstance(rhs, IntLiteral):
+                value = binary(expr.op, lhs.value, rhs.value)
+                if value is not None:
+                    return IntLiteral(int(value))
+            return Binary(expr.op, lhs, rhs)
+        return expr
+
+    def _set(self, env: dict, ident: Identifier, expr: Expression) -> None:
+        if isinstance(expr, IntLiteral):
+            env[ident.value] = expr.value
+        else:
+            env.pop(ident.value, None)
+
+    def _no_link(self, x: Expression, y: Expression) -> bool:
+        if self.topo is None or not isinstance(x, IntLiteral) or not isinstance(y, IntLiteral):
+            return False
+        if not (1 <= x.value <= self.topo.n and 1 <= y.value <= self.topo.n):
+            return False
+        return not self.topo.connected(x.value, y.value)
+
+    def block(self, program: Program, env: dict) -> list[Statement]:
+        """Optimize a block under `env`, which is updated to hold at the end of the block."""
+        ret = list()
+        for stmt in program.children:
+            self.stmt(stmt, env, ret)
+        return ret
+
+    def stmt(self, stmt: Statement, env: dict, out: list[Statement]) -> None:
+        start = len(out)
+        self._stmt(stmt, env, out)
+        # statements built here report the source line of the statement they replace
+        for new_stmt in out[start:]:
+            if new_stmt.getattr("lineno") is None:
+                new_stmt.setattr("lineno", stmt.getattr("lineno"))
+
+    def _stmt(self, stmt: Statement, env: dict, out: list[Statement]) -> None:
+        if isinstance(stmt, Assignment):
+            expr = self.fold(stmt.expr, env)
+            self._set(env, stmt.ident, expr)
+            out.append(Assignment(stmt.ident, expr))
+        elif isinstance(stmt, AssignmentCr):
+            x = self.fold(stmt.expr1, env)
+            y = self.fold(stmt.expr2, env)
+            if self._no_link(x, y):
+                env[stmt.ident.value] = 0
+                out.append(Assignment(stmt.ident, IntLiteral(0)))
+            else:
+                env.pop(stmt.ident.value, None)
+                out.append(AssignmentCr(stmt.ident, x, y))
+        elif isinstance(stmt, AssignmentSw):
+            x = self.fold(stmt.expr1, env)
+            y = self.fold(stmt.expr2, env)
+            z = self.fold(stmt.expr3, env)
+            env.pop(stmt.ident.value, None)
+            out.append(AssignmentSw(stmt.ident, x, y, z))
+        elif isinstance(stmt, De):
+            out.append(De(self.fold(stmt.expr1, env), self.fold(stmt.expr2, env)))
+        elif isinstance(stmt, Assertion):
+            cond = self.fold(stmt.cond, env)
+            if not (isinstance(cond, IntLiteral) and cond.value != 0):
+                out.append(Assertion(cond))
+        elif isinstance(stmt, Forget):
+            for ident in stmt.ident_list.children:
+                env.pop(ident.value, None)
+            out.append(stmt)
+        elif isinstance(stmt, If):
+            self.stmt_if(stmt, env, out)
+        elif isinstance(stmt, While):
+            self.stmt_while(stmt, env, out)
+        elif not isinstance(stmt, Pass):
+            out.append(stmt)
+
+    def stmt_if(self, stmt: If, env: dict, out: list[Statement]) -> None:
+        cond = self.fold(stmt.cond, env)
+        if isinstance(cond, IntLiteral):
+            out.extend(self.block(stmt.then if cond.value != 0 else stmt.otherwise, env))
+            return
+        env_then = env.copy()
+        env_else = env.copy()
+        then = self.block(stmt.then, env_then)
+        otherwise = self.block(stmt.otherwise, env_else)
+        env.clear()
+        env.update({
+            ident: value
+            for ident, value in env_then.items()
+            if env_else.get(ident) == value and ident in env_else
+        })
+        out.append(If(cond, Program(*then), Program(*otherwise)))
+
+    def stmt_while(self, stmt: While, env: dict, out: list[Statement]) -> None:
+        unrolled = self.unroll(stmt, env)
+        if unrolled is not None:
+            stmts, env_exit = unrolled
+            out.extend(stmts)
+            env.clear()
+            env.update(env_exit)
+            return
+        for ident in defs(stmt.body):
+            env.pop(ident, None)
+        cond = self.fold(stmt.cond, env)
+        body = self.block(stmt.body, env.copy())
+        loop = While(cond, Program(*body))
+        loop.setattr("lineno", stmt.getattr("lineno"))
+        out.append(loop)
+
+    def unroll(self, stmt: While, env: dict):
+        """
+        Try to unroll a loop completely.
+        Returns the unrolled statements and the environment after the loop,
+        or `None` if the trip count is not known at compile time or exceeds the bounds.
+        """
+        env = env.copy()
+        stmts = list()
+        for _ in range(0, min(self.max_unroll, self.bound.iterations(stmt.getattr("lineno"))) + 1):
+            cond = self.fold(stmt.cond, env)
+            if not isinstance(cond, IntLiteral):
+                return None
+            if cond.value == 0:
+                return stmts, env
+            stmts.extend(self.block(stmt.body, env))
+            if len(stmts) > self.max_stmts:
+                return None
+        return None
+
+
+def optimize(program: Program, topo: Optional[Topology] = None, bound: Optional[LoopBound] = None) -> Program:
+    return Optimizer(topo, bound=bound).optimize(program)
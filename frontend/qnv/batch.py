@@ -0,0 +1,266 @@
+import numpy as np
+
+from .topology import Topology
+
+
+class BatchConfiguration:
+    """
+    A probability distribution over configurations, stored column-wise.
+    Row `i` of every column describes the `i`-th configuration:
+
+    `prob`: probability vector of shape `(k,)`.
+    `vals`: variable matrix of shape `(k, len(names))`, where column `j` holds variable `names[j]`.
+    `defined`: boolean matrix of the same shape telling whether a variable is defined in a configuration.
+        Undefined entries of `vals` are always 0, so that equal states have equal rows.
+    `null`: boolean matrix of the same shape telling whether a defined variable holds `None`
+        (the result of a division by zero, as in `PConfiguration`); its entry of `vals` is 0 as well.
+    `ent`: stacked entanglement tensor of shape `(k, n * (n + 1) / 2)`,
+        the packed upper triangle (diagonal included) of the symmetric entanglement matrix.
+
+    `cr`, `sw` and `de` are applied to the whole batch at once with NumPy masks and fancy indexing.
+    Branching concatenates the failure and the success slices, after which identical rows are merged.
+    """
+
+    def __init__(self, n: int, names: list, prob, vals, defined, null, ent):
+        self.n = n
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.prob = prob
+        self.vals = vals
+        self.defined = defined
+        self.null = null
+        self.ent = ent
+
+    @classmethod
+    def initial(cls, topo: Topology) -> "BatchConfiguration":
+        n = topo.n
+        return cls(
+            n,
+            [],
+            np.ones(1, dtype=float),
+            np.zeros((1, 0), dtype=np.int64),
+            np.zeros((1, 0), dtype=bool),
+            np.zeros((1, 0), dtype=bool),
+            np.zeros((1, n * (n + 1) // 2), dtype=np.int64),
+        )
+
+    def empty(self) -> "BatchConfiguration":
+        return self._select(np.zeros(0, dtype=np.intp))
+
+    def __len__(self) -> int:
+        return self.prob.shape[0]
+
+    def _pair(self, xs, ys):
+        """Column of the node pairs `(xs[i], ys[i])` in `ent`. Nodes are numbered from 1."""
+        lo = np.minimum(xs, ys) - 1
+        hi = np.maximum(xs, ys) - 1
+        return lo * self.n - lo * (lo - 1) // 2 + (hi - lo)
+
+    def _broadcast(self, values):
+        return np.broadcast_to(np.asarray(values, dtype=np.int64), (len(self),))
+
+    def _select(self, rows) -> "BatchConfiguration":
+        return type(self)(
+            self.n,
+            list(self.names),
+            self.prob[rows],
+            self.vals[rows],
+            self.defined[rows],
+            self.null[rows],
+            self.ent[rows],
+        )
+
+    def _column(self, ident: str) -> int:
+        col = self.index.get(ident)
+        if col is None:
+            col = len(self.names)
+            self.names.append(ident)
+            self.index[ident] = col
+            self.vals = np.hstack([self.vals, np.zeros((len(self), 1), dtype=np.int64)])
+            self.defined = np.hstack([self.defined, np.zeros((len(self), 1), dtype=bool)])
+            self.null = np.hstack([self.null, np.zeros((len(self), 1), dtype=bool)])
+        return col
+
+    def _aligned(self, other: "BatchConfiguration"):
+        """The variable columns of `other`, reordered (and padded) to match `self.names`."""
+        for name in other.names:
+            self._column(name)
+        vals = np.zeros((len(other), len(self.names)), dtype=np.int64)
+        defined = np.zeros((len(other), len(self.names)), dtype=bool)
+        null = np.zeros((len(other), len(self.names)), dtype=bool)
+        cols = [self.index[name] for name in other.names]
+        vals[:, cols] = other.vals
+        defined[:, cols] = other.defined
+        null[:, cols] = other.null
+        return vals, defined, null
+
+    def _concat(self, prob, vals, defined, null, ent) -> None:
+        self.prob = np.concatenate([self.prob, prob])
+        self.vals = np.concatenate([self.vals, vals])
+        self.defined = np.concatenate([self.defined, defined])
+        self.null = np.concatenate([self.null, null])
+        self.ent = np.concatenate([self.ent, ent])
+
+    def _merge_duplicates(self) -> None:
+        """Merge identical rows, keeping the order in which states first appear."""
+        if len(self) <= 1:
+            return
+        rows = np.ascontiguousarray(np.hstack([self.vals, self.defined, self.null, self.ent]))
+        keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        if first.shape[0] == len(self):
+            return
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.shape[0])
+        prob = np.bincount(rank[inverse.ravel()], weights=self.prob, minlength=order.shape[0])
+        rows = first[order]
+        self.prob = prob
+        self.vals = self.vals[rows]
+        self.defined = self.defined[rows]
+        self.null = self.null[rows]
+        self.ent = self.ent[rows]
+
+    def merge(self, other: "BatchConfiguration") -> None:
+        vals, defined, null = self._aligned(other)
+        self._concat(other.prob, vals, defined, null, other.ent)
+        self._merge_duplicates()
+
+    def load(self, other: "BatchConfiguration") -> None:
+        self.names = other.names
+        self.index = other.index
+        self.prob = other.prob
+        self.vals = other.vals
+        self.defined = other.defined
+        self.null = other.null
+        self.ent = other.ent
+
+    def split(self, conds) -> tuple["BatchConfiguration", "BatchConfiguration"]:
+        mask = np.broadcast_to(np.asarray(conds) != 0, (len(self),))
+        return self._select(mask), self._select(~mask)
+
+    def probabilities(self):
+        return self.prob
+
+    def total(self) -> float:
+        return float(self.prob.sum())
+
+    def lookup(self, ident: str):
+        col = self.index.get(ident)
+        if col is None or not self.defined[:, col].all():
+            raise KeyError(ident)
+        if self.null[:, col].any():
+            ret = self.vals[:, col].astype(object)
+            ret[self.null[:, col]] = None
+            return ret
+        return self.vals[:, col].copy()
+
+    def assign(self, ident: str, values) -> None:
+        col = self._column(ident)
+        values = np.broadcast_to(values, (len(self),))
+        if values.dtype == object:
+            # `None` comes from a division by zero: the variable is defined and holds `None`
+            null = np.equal(values, None)
+            self.vals[:, col] = np.where(null, 0, values).astype(np.int64)
+            self.null[:, col] = null
+        else:
+            self.vals[:, col] = values
+            self.null[:, col] = False
+        self.defined[:, col] = True
+        self._merge_duplicates()
+
+    def _branch(self, ident: str, ok, prob, pair) -> None:
+        """
+        Split every configuration into a failure branch (`ident` = 0) and,
+        where `ok` holds, a success branch (`ident` = 1) that gains one pair at column `pair`
+        and happens with probability `prob`.
+        """
+        col = self._column(ident)
+        succ = self._select(ok)
+        succ.prob = succ.prob * prob[ok]
+        succ.vals[:, col] = 1
+        succ.defined[:, col] = True
+        succ.null[:, col] = False
+        succ.ent[np.arange(len(succ)), pair[ok]] += 1
+        self.prob = self.prob * np.where(ok, 1 - prob, 1)
+        self.vals[:, col] = 0
+        self.defined[:, col] = True
+        self.null[:, col] = False
+        self._concat(succ.prob, succ.vals, succ.defined, succ.null, succ.ent)
+        self._merge_duplicates()
+
+    def cr(self, ident: str, values1, values2, topo: Topology) -> None:
+        xs = self._broadcast(values1)
+        ys = self._broadcast(values2)
+        pair = self._pair(xs, ys)
+        cnt = self.ent[np.arange(len(self)), pair]
+        s = np.asarray(topo.s)
+        p = topo.links(xs, ys)
+        ok = (p >= 1e-8) & (cnt != s[xs - 1]) & (cnt != s[ys - 1])
+        self._branch(ident, ok, p, pair)
+
+    def sw(self, ident: str, values1, values2, values3, topo: Topology) -> None:
+        xs = self._broadcast(values1)
+        ys = self._broadcast(values2)
+        zs = self._broadcast(values3)
+        rows = np.arange(len(self))
+        xz = self._pair(xs, zs)
+        yz = self._pair(ys, zs)
+        ok = (self.ent[rows, xz] != 0) & (self.ent[rows, yz] != 0)
+        self.ent[rows[ok], xz[ok]] -= 1
+        self.ent[rows[ok], yz[ok]] -= 1
+        q = np.asarray(topo.q)[zs - 1]
+        self._branch(ident, ok, q, self._pair(xs, ys))
+
+    def de(self, values1, values2, topo: Topology) -> None:
+        xs = self._broadcast(values1)
+        ys = self._broadcast(values2)
+        rows = np.arange(len(self))
+        pair = self._pair(xs, ys)
+        ok = self.ent[rows, pair] != 0
+        self.ent[rows[ok], pair[ok]] -= 1
+        self._merge_duplicates()
+
+    def forget(self, idents: list, strict: bool = True) -> None:
+        for ident in idents:
+            col = self.index.get(ident)
+            if col is None and not strict:
+                continue
+            if col is None or (strict and not self.defined[:, col].all()):
+                raise KeyError(ident)
+            keep = [i for i in range(len(self.names)) if i != col]
+            self.names = [self.names[i] for i in keep]
+            self.index = {name: i for i, name in enumerate(self.names)}
+            self.vals = self.vals[:, keep]
+            self.defined = self.defined[:, keep]
+            self.null = self.null[:, keep]
+        self._merge_duplicates()
+
+    def _value(self, row: int, col: int):
+        return None if self.null[row, col] else int(self.vals[row, col])
+
+    def _dense(self, row: int):
+        ent = np.zeros((self.n, self.n), dtype=int)
+        ent[np.triu_indices(self.n)] = self.ent[row]
+        return ent + np.triu(ent, 1).T
+
+    def records(self):
+        """Generate every configuration as `(prob, mem, links)`, as `PConfiguration.records` does."""
+        xs, ys = np.triu_indices(self.n)
+        for i in range(len(self)):
+            yield (
+                float(self.prob[i]),
+                {name: self._value(i, j) for j, name in enumerate(self.names) if self.defined[i, j]},
+                [(int(xs[k]) + 1, int(ys[k]) + 1, int(self.ent[i, k])) for k in np.flatnonzero(self.ent[i])],
+            )
+
+    def print(self, slack=0.0):
+        for i in range(len(self)):
+            print(f"[{self.prob[i]}, {self.prob[i] + slack}]" if slack else self.prob[i])
+            print({
+                name: self._value(i, j)
+                for j, name in sorted(enumerate(self.names), key=lambda item: item[1])
+                if self.defined[i, j]
+            })
+            print(self._dense(i))
+            print('')
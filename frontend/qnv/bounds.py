@@ -0,0 +1,43 @@
+import time
+from typing import Optional
+
+
+class LoopBound:
+    """
+    Decides when the analysis stops unrolling a `while` loop.
+
+    `max_iterations`: number of iterations of any loop.
+    `per_loop`: maps the line of a `while` statement to its own number of iterations.
+    `time_limit`: seconds after `start` past which every loop stops at its next iteration (0 means no limit).
+
+    When a loop is cut, the configurations that would run one more iteration are dropped,
+    and their probability mass is added to `unresolved`: it may end up in any final configuration, or never terminate.
+    Every other configuration is analysed as usual.
+    """
+
+    def __init__(self, max_iterations: int = 1000, per_loop: Optional[dict] = None, time_limit: float = 0.0) -> None:
+        self.max_iterations = max_iterations
+        self.per_loop = per_loop if per_loop is not None else dict()
+        self.time_limit = time_limit
+        self.deadline = None
+        self.unresolved = 0.0
+        self.cuts = 0
+
+    def start(self) -> None:
+        """Start the clock of the time limit, unless it is already running."""
+        if self.time_limit > 0 and self.deadline is None:
+            self.deadline = time.monotonic() + self.time_limit
+
+    def iterations(self, line: Optional[int]) -> int:
+        """Number of iterations the loop at `line` may run, regardless of the time limit."""
+        return self.per_loop.get(line, self.max_iterations)
+
+    def exceeded(self, line: Optional[int], count: int) -> bool:
+        """Whether the loop at `line`, having run `count` iterations, must stop."""
+        if count >= self.iterations(line):
+            return True
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def cut(self, mass) -> None:
+        self.unresolved = self.unresolved + mass
+        self.cuts = self.cuts + 1
@@ -1,77 +1,302 @@
+import numpy as np
+
+from .entanglement import Entanglement
+from .persistent import PMap
 from .topology import Topology
 
+_MISSING = object()
+
 class DConfiguration:
-    def __init__(self, mem: dict, ent, prob=1.0):
+    """
+    A configuration: the memory `mem` (a persistent map from variable names to values),
+    the entanglement state `ent` and the probability `prob` of reaching it.
+    `mem` and `ent` are immutable, so branching shares them between the new configurations
+    and only pays for the cells that actually change.
+    """
+
+    def __init__(self, mem: PMap, ent: Entanglement, prob=1.0):
         self.mem = mem
         self.ent = ent
         self.prob = prob
 
-    def assign(self, ident: str, value):
-        self.mem[ident] = value
-    
+    def key(self):
+        """
+        Canonical, hashable encoding of the state `(mem, ent)`.
+        Configurations with equal keys describe the same state and can be merged.
+        Persistent maps keep their hash up to date, so computing the key costs O(1).
+        """
+        return (self.mem, self.ent.key())
+
+    def assign(self, ident: str, value, pconf):
+        self.mem = self.mem.set(ident, value)
+        pconf.add(self)
+
     def cr(self, ident: str, x, y, topo: Topology, pconf):
-        if topo.p[x - 1][y - 1] < 1e-8 or self.ent[x - 1][y - 1] == topo.s[x - 1] or self.ent[x - 1][y - 1] == topo.s[y - 1]:
-            self.mem[ident] = 0
+        cnt = self.ent.get(x, y)
+        if not topo.connected(x, y) or cnt == topo.capacity(x) or cnt == topo.capacity(y):
+            self.mem = self.mem.set(ident, 0)
+            pconf.add(self)
             return
-        new_mem = self.mem.copy()
-        new_ent = self.ent.copy()
-        new_mem[ident] = 1
-        new_ent[x - 1][y - 1] = new_ent[x - 1][y - 1] + 1
-        new_ent[y - 1][x - 1] = new_ent[x - 1][y - 1]
-        pconf.dconfs.append(DConfiguration(new_mem, new_ent, self.prob * topo.p[x - 1][y - 1]))
-        self.prob = self.prob * (1 - topo.p[x - 1][y - 1])
-        self.mem[ident] = 0
-    
+        p = topo.link(x, y)
+        new_dconf = DConfiguration(self.mem.set(ident, 1), self.ent.add(x, y, 1), self.prob * p)
+        self.prob = self.prob * (1 - p)
+        self.mem = self.mem.set(ident, 0)
+        pconf.add(self)
+        pconf.add(new_dconf)
+
     def sw(self, ident: str, x, y, z, topo: Topology, pconf):
-        if self.ent[x - 1][z - 1] == 0 or self.ent[y - 1][z - 1] == 0:
-            self.mem[ident] = 0
+        if self.ent.get(x, z) == 0 or self.ent.get(y, z) == 0:
+            self.mem = self.mem.set(ident, 0)
+            pconf.add(self)
             return
-        self.ent[x - 1][z - 1] = self.ent[x - 1][z - 1] - 1
-        self.ent[z - 1][x - 1] = self.ent[x - 1][z - 1]
-        self.ent[y - 1][z - 1] = self.ent[y - 1][z - 1] - 1
-        self.ent[z - 1][y - 1] = self.ent[y - 1][z - 1]
-        new_mem = self.mem.copy()
-        new_ent = self.ent.copy()
-        new_mem[ident] = 1
-        new_ent[x - 1][y - 1] = new_ent[x - 1][y - 1] + 1
-        new_ent[y - 1][x - 1] = new_ent[x - 1][y - 1]
-        pconf.dconfs.append(DConfiguration(new_mem, new_ent, self.prob * topo.q[z - 1]))
-        self.prob = self.prob * (1 - topo.q[z - 1])
-        self.mem[ident] = 0
-    
+        self.ent = self.ent.add(x, z, -1).add(y, z, -1)
+        q = topo.swap(z)
+        new_dconf = DConfiguration(self.mem.set(ident, 1), self.ent.add(x, y, 1), self.prob * q)
+        self.prob = self.prob * (1 - q)
+        self.mem = self.mem.set(ident, 0)
+        pconf.add(self)
+        pconf.add(new_dconf)
+
     def de(self, x, y, topo: Topology, pconf):
-        if self.ent[x - 1][y - 1] == 0:
-            return
-        self.ent[x - 1][y - 1] = self.ent[x - 1][y - 1] - 1
-        self.ent[y - 1][x - 1] = self.ent[x - 1][y - 1]
+        if self.ent.get(x, y) != 0:
+            self.ent = self.ent.add(x, y, -1)
+        pconf.add(self)
 
-    def print(self):
-        print(self.prob)
+    def print(self, slack=0.0):
+        print(f"[{self.prob}, {self.prob + slack}]" if slack else self.prob)
         print(self.mem)
         print(self.ent)
 
 
 class PConfiguration:
-    def __init__(self, dconfs: list):
-        self.dconfs = dconfs
-
-    def assign(self, ident: str, values: list):
-        for i in range(0, len(self.dconfs)):
-            self.dconfs[i].assign(ident, values[i])
-    
-    def cr(self, ident: str, values1: list, values2: list, topo: Topology):
-        for i in range(0, len(values1)):
-            self.dconfs[i].cr(ident, values1[i], values2[i], topo, self)
-
-    def sw(self, ident: str, values1: list, values2: list, values3: list, topo: Topology):
-        for i in range(0, len(values1)):
-            self.dconfs[i].sw(ident, values1[i], values2[i], values3[i], topo, self)
-    
-    def de(self, values1: list, values2: list, topo: Topology):
-        for i in range(0, len(values1)):
-            self.dconfs[i].de(values1[i], values2[i], topo, self)
-
-    def print(self):
-        for dconf in self.dconfs:
-            dconf.print()
-            print('')
\ No newline at end of file
+    """
+    A probability distribution over configurations.
+    `dconfs` maps the key of every configuration (see `DConfiguration.key`) to the configuration itself,
+    so that identical states are merged as soon as they are added.
+
+    `uniform` holds the variables that have the same value in every configuration (loop counters, constants...).
+    They are stored once, here, instead of in the `mem` of every configuration:
+    looking one up returns a scalar, so expressions and conditions over such variables are evaluated once,
+    and a condition that evaluates to a scalar selects a branch without splitting the distribution.
+    A variable is never both in `uniform` and in the `mem` of a configuration.
+
+    Note that a configuration must not be mutated while it is stored in `dconfs`:
+    the operations below take all configurations out, update them, and add them back.
+    """
+
+    def __init__(self, dconfs=()):
+        self.dconfs = dict()
+        self.uniform = dict()
+        for dconf in dconfs:
+            self.add(dconf)
+
+    @classmethod
+    def initial(cls, topo: Topology) -> "PConfiguration":
+        """The distribution a program starts from: no variables and no entanglement."""
+        return cls([DConfiguration(PMap(), Entanglement(topo.n))])
+
+    def empty(self) -> "PConfiguration":
+        return type(self)()
+
+    def _copy(self) -> "PConfiguration":
+        ret = type(self)()
+        ret.dconfs = dict(self.dconfs)
+        ret.uniform = dict(self.uniform)
+        return ret
+
+    def __len__(self) -> int:
+        return len(self.dconfs)
+
+    def __iter__(self):
+        return iter(self.dconfs.values())
+
+    def add(self, dconf: DConfiguration) -> None:
+        key = dconf.key()
+        old = self.dconfs.get(key)
+        if old is None:
+            self.dconfs[key] = dconf
+        else:
+            old.prob = old.prob + dconf.prob
+
+    def merge(self, other: "PConfiguration") -> None:
+        if len(other) == 0:
+            return
+        if len(self) == 0:
+            self.load(other)
+            return
+        differ = [
+            ident
+            for ident in self.uniform.keys() | other.uniform.keys()
+            if ident not in self.uniform or ident not in other.uniform or self.uniform[ident] != other.uniform[ident]
+        ]
+        if differ:
+            self._materialize(differ)
+            other = other._copy()
+            other._materialize(differ)
+        for dconf in other:
+            self.add(dconf)
+
+    def load(self, other: "PConfiguration") -> None:
+        """Replace the content of this distribution by the content of `other`."""
+        self.dconfs = other.dconfs
+        self.uniform = other.uniform
+
+    def _materialize(self, idents) -> None:
+        """Move the uniform variables `idents` (those that are uniform) into the `mem` of every configuration."""
+        idents = [ident for ident in idents if ident in self.uniform]
+        if not idents:
+            return
+        for dconf in self._take():
+            for ident in idents:
+                dconf.mem = dconf.mem.set(ident, self.uniform[ident])
+            self.add(dconf)
+        for ident in idents:
+            del self.uniform[ident]
+
+    def materialize(self) -> None:
+        """Move every uniform variable into the `mem` of every configuration."""
+        self._materialize(list(self.uniform))
+
+    def split(self, conds) -> tuple["PConfiguration", "PConfiguration"]:
+        """
+        Split the distribution by the evaluated condition `conds`.
+        Returns the configurations where the condition holds and those where it does not.
+        """
+        if np.ndim(conds) == 0:
+            if conds != 0:
+                return self._copy(), self.empty()
+            return self.empty(), self._copy()
+        conds = self._values(np.not_equal(conds, 0))
+        ctx1 = self.empty()
+        ctx0 = self.empty()
+        ctx1.uniform = dict(self.uniform)
+        ctx0.uniform = dict(self.uniform)
+        for i, dconf in enumerate(self):
+            if conds[i]:
+                ctx1.add(dconf)
+            else:
+                ctx0.add(dconf)
+        return ctx1, ctx0
+
+    def lookup(self, ident: str):
+        if ident in self.uniform:
+            return self.uniform[ident]
+        return np.array([dconf.mem[ident] for dconf in self])
+
+    def full(self) -> list[DConfiguration]:
+        """
+        Copies of the configurations whose `mem` includes the uniform variables.
+        A `PMap` has no order of its own: it prints (and converts to a dict) sorted by name, uniform variables included.
+        """
+        return [
+            DConfiguration(PMap({**dconf.mem.to_dict(), **self.uniform}) if self.uniform else dconf.mem, dconf.ent, dconf.prob)
+            for dconf in self
+        ]
+
+    def component(self, k: int) -> "PConfiguration":
+        """
+        The distribution for the `k`-th topology of a `TopologyBatch`,
+        from a distribution whose probabilities are vectors over the batch.
+        """
+        ret = type(self)(
+            DConfiguration(dconf.mem, dconf.ent, dconf.prob[k] if np.ndim(dconf.prob) else dconf.prob) for dconf in self
+        )
+        ret.uniform = dict(self.uniform)
+        return ret
+
+    def records(self):
+        """
+        Generate every configuration as `(prob, mem, links)`, one at a time and in no particular order:
+        `mem` is a dict that includes the uniform variables,
+        and `links` lists the sparse entanglement state as `(x, y, count)` triples with `x <= y`.
+        """
+        for dconf in self:
+            mem = dconf.mem.to_dict()
+            mem.update(self.uniform)
+            yield dconf.prob, mem, [(x, y, cnt) for (x, y), cnt in sorted(dconf.ent.links.items())]
+
+    def probabilities(self):
+        return np.fromiter((dconf.prob for dconf in self), dtype=float, count=len(self))
+
+    def total(self):
+        """Total probability mass (a vector or a polynomial if probabilities are)."""
+        return sum((dconf.prob for dconf in self), 0.0)
+
+    def _take(self) -> list:
+        dconfs = list(self.dconfs.values())
+        self.dconfs = dict()
+        return dconfs
+
+    def _values(self, values) -> list:
+        """Turn a scalar or a column of values into a list of Python values, one per configuration."""
+        return np.broadcast_to(values, (len(self),)).tolist()
+
+    def _uniform_value(self, values):
+        """
+        The single value of `values` if it is the same for every configuration, `_MISSING` otherwise.
+        Values are converted to Python values, as `_values` does.
+        """
+        if np.ndim(values) == 0:
+            return np.asarray(values).tolist()
+        if len(values) > 0 and (values == values[0]).all():
+            return np.asarray(values[0]).tolist()
+        return _MISSING
+
+    def assign(self, ident: str, values):
+        value = self._uniform_value(values)
+        if value is not _MISSING:
+            if ident not in self.uniform:
+                for dconf in self._take():
+                    dconf.mem = dconf.mem.discard(ident)
+                    self.add(dconf)
+            self.uniform[ident] = value
+            return
+        self.uniform.pop(ident, None)
+        values = self._values(values)
+        dconfs = self._take()
+        for i in range(0, len(dconfs)):
+            dconfs[i].assign(ident, values[i], self)
+
+    def cr(self, ident: str, values1, values2, topo: Topology):
+        self.uniform.pop(ident, None)
+        values1 = self._values(values1)
+        values2 = self._values(values2)
+        dconfs = self._take()
+        for i in range(0, len(dconfs)):
+            dconfs[i].cr(ident, values1[i], values2[i], topo, self)
+
+    def sw(self, ident: str, values1, values2, values3, topo: Topology):
+        self.uniform.pop(ident, None)
+        values1 = self._values(values1)
+        values2 = self._values(values2)
+        values3 = self._values(values3)
+        dconfs = self._take()
+        for i in range(0, len(dconfs)):
+            dconfs[i].sw(ident, values1[i], values2[i], values3[i], topo, self)
+
+    def de(self, values1, values2, topo: Topology):
+        values1 = self._values(values1)
+        values2 = self._values(values2)
+        dconfs = self._take()
+        for i in range(0, len(dconfs)):
+            dconfs[i].de(values1[i], values2[i], topo, self)
+
+    def forget(self, idents: list, strict: bool = True):
+        """Forget variables. Unless `strict`, variables that are not defined are ignored instead of raising `KeyError`."""
+        idents = [ident for ident in idents if self.uniform.pop(ident, _MISSING) is _MISSING]
+        if not idents:
+            return
+        dconfs = self._take()
+        for dconf in dconfs:
+            for ident in idents:
+                dconf.mem = dconf.mem.remove(ident) if strict else dconf.mem.discard(ident)
+            self.add(dconf)
+
+    def print(self, slack=0.0):
+        """
+        Print every configuration.
+        A nonzero `slack` (e.g. discarded probability mass) prints each probability `p` as the interval `[p, p + slack]`.
+        """
+        for dconf in self.full():
+            dconf.print(slack)
+            print('')
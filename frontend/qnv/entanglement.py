@@ -0,0 +1,52 @@
+import numpy as np
+
+from .persistent import PMap
+
+
+class Entanglement:
+    """
+    Sparse, symmetric and immutable entanglement state of a configuration.
+    `links` maps an unordered node pair `(x, y)` with `x <= y` to the number of entangled pairs
+    currently shared by nodes `x` and `y`. Nodes are numbered from 1, as in QNV programs.
+    Pairs that share nothing are never stored, so the representation is canonical.
+
+    `links` is a persistent map: `add` returns a new state sharing almost all of its structure with this one,
+    so that sibling configurations do not pay for copying the links they have in common.
+    """
+
+    def __init__(self, n: int, links: PMap = None):
+        self.n = n
+        self.links = links if links is not None else PMap()
+
+    @staticmethod
+    def _pair(x, y):
+        return (x, y) if x <= y else (y, x)
+
+    def get(self, x, y) -> int:
+        return self.links.get(self._pair(x, y), 0)
+
+    def add(self, x, y, delta: int) -> "Entanglement":
+        pair = self._pair(x, y)
+        cnt = self.links.get(pair, 0) + delta
+        if cnt == 0:
+            return Entanglement(self.n, self.links.discard(pair))
+        return Entanglement(self.n, self.links.set(pair, cnt))
+
+    def key(self):
+        return self.links
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Entanglement) and self.n == other.n and self.links == other.links
+
+    def __hash__(self) -> int:
+        return hash(self.links)
+
+    def to_dense(self):
+        ent = np.zeros((self.n, self.n), dtype=int)
+        for (x, y), cnt in self.links.items():
+            ent[x - 1][y - 1] = cnt
+            ent[y - 1][x - 1] = cnt
+        return ent
+
+    def __str__(self) -> str:
+        return str(self.to_dense())
@@ -0,0 +1,118 @@
+from typing import Optional
+
+from frontend.ir.instr import IRProgram, Opcode
+from frontend.qnv.bounds import LoopBound
+from frontend.qnv.configuration import PConfiguration
+from frontend.qnv.operators import BINARY_OPS, UNARY_OPS
+from frontend.qnv.pruning import Pruner
+from frontend.qnv.topology import Topology
+
+
+class Executor:
+    """
+    Runs an `IRProgram` against a distribution of configurations.
+    It computes the same semantic function as `QNV`, without the visitor double dispatch.
+
+    Since configurations take different paths through the program, `run` keeps,
+    besides the configurations being executed at `pc`, a set of pending distributions
+    waiting at the targets of forward jumps. They are merged into the current one when `pc` reaches them.
+    Programs produced by the compiler are structured, so whenever the current distribution becomes empty,
+    the smallest pending target is the next place to go.
+    `pruner` is used as in `QNV`: after `cr`, `sw`, every join of pending configurations and every loop iteration.
+    `bound` is used as in `QNV` as well. Once a loop has run out of iterations, its `LOOP` still jumps back,
+    and the configurations its head `BRANCH` keeps in the loop are cut: loop conditions are straight-line code,
+    so the next `BRANCH` executed is the one of that loop.
+    """
+
+    def __init__(
+        self, topo: Topology, engine=PConfiguration, pruner: Optional[Pruner] = None, bound: Optional[LoopBound] = None
+    ):
+        self.topo = topo
+        self.engine = engine
+        self.prune = pruner if pruner is not None else lambda ctx: None
+        self.bound = bound if bound is not None else LoopBound()
+
+    def analyse(self, program: IRProgram):
+        self.bound.start()
+        ctx = self.engine.initial(self.topo)
+        return self.run(program, ctx)
+
+    def run(self, program: IRProgram, ctx):
+        code = program.code
+        names = program.vars
+        topo = self.topo
+        prune = self.prune
+        regs = [None] * program.nregs
+        bound = self.bound
+        lines = program.lines
+        loop_cnt = [0] * program.nloops
+        cut = False
+        pending = dict()
+        done = ctx.empty()
+
+        def defer(target, ctx):
+            if target in pending:
+                pending[target].merge(ctx)
+            else:
+                pending[target] = ctx
+
+        pc = 0
+        while True:
+            if pc in pending:
+                waiting = pending.pop(pc)
+                waiting.merge(ctx)
+                ctx = waiting
+                prune(ctx)
+            if pc == len(code):
+                done.merge(ctx)
+                ctx = ctx.empty()
+            if len(ctx) == 0:
+                if not pending:
+                    break
+                pc = min(pending)
+                ctx = pending.pop(pc)
+                continue
+
+            opcode, ops = code[pc].opcode, code[pc].operands
+            pc = pc + 1
+            if opcode == Opcode.LOAD:
+                regs[ops[0]] = ctx.lookup(names[ops[1]])
+            elif opcode == Opcode.LOADI:
+                regs[ops[0]] = ops[1]
+            elif opcode == Opcode.BINARY:
+                regs[ops[0]] = BINARY_OPS[ops[1]](regs[ops[2]], regs[ops[3]])
+            elif opcode == Opcode.UNARY:
+                regs[ops[0]] = UNARY_OPS[ops[1]](regs[ops[2]])
+            elif opcode == Opcode.STORE:
+                ctx.assign(names[ops[0]], regs[ops[1]])
+            elif opcode == Opcode.BRANCH:
+                ctx, ctx0 = ctx.split(regs[ops[0]])
+                defer(ops[1], ctx0)
+                if cut:
+                    if len(ctx) > 0:
+                        bound.cut(ctx.total())
+                        ctx = ctx.empty()
+                    cut = False
+            elif opcode == Opcode.JUMP:
+                defer(ops[0], ctx)
+                ctx = ctx.empty()
+            elif opcode == Opcode.LOOP:
+                loop_cnt[ops[1]] = loop_cnt[ops[1]] + 1
+                cut = bound.exceeded(lines[ops[1]] if lines else None, loop_cnt[ops[1]])
+                prune(ctx)
+                pc = ops[0]
+            elif opcode == Opcode.LOOPINIT:
+                loop_cnt[ops[0]] = 0
+            elif opcode == Opcode.CR:
+                ctx.cr(names[ops[0]], regs[ops[1]], regs[ops[2]], topo)
+                prune(ctx)
+            elif opcode == Opcode.SW:
+                ctx.sw(names[ops[0]], regs[ops[1]], regs[ops[2]], regs[ops[3]], topo)
+                prune(ctx)
+            elif opcode == Opcode.DE:
+                ctx.de(regs[ops[0]], regs[ops[1]], topo)
+            elif opcode == Opcode.ASSERT:
+                ctx = ctx.split(regs[ops[0]])[0]
+            elif opcode == Opcode.FORGET:
+                ctx.forget([names[var] for var in ops[0]], ops[1])
+        return done
@@ -0,0 +1,184 @@
+"""
+Module that computes the semantic function of a QNV program as a product of independent factors.
+
+When parts of a protocol act on disjoint sets of nodes and variables, the distribution of configurations
+is the product of independent distributions, and enumerating it costs the product of their sizes.
+`FactoredQNV` keeps such a distribution as a list of factors, each a `PConfiguration` over its own variables
+and nodes, and runs every top-level statement on the product of only the factors that statement touches:
+those holding a variable it mentions, or a node its `cr`, `sw` and `de` statements may reach.
+Analysing segments that never interact thus costs the sum of their sizes instead of the product.
+
+Variables that a statement only reads and that have a single value in their factor (constants, counters)
+do not connect factors: they are lent to the joined factor while the statement runs.
+The endpoints of `cr`, `sw` and `de` must be known before the statement runs to tell which nodes it reaches;
+if one of them depends on a variable that is not uniform, every factor is joined.
+"""
+
+from typing import Optional
+
+from frontend.ast.tree import *
+from frontend.passes.liveness import defs, uses, variables
+from frontend.qnv.bounds import LoopBound
+from frontend.qnv.configuration import DConfiguration, PConfiguration
+from frontend.qnv.entanglement import Entanglement
+from frontend.qnv.operators import binary, unary
+from frontend.qnv.persistent import PMap
+from frontend.qnv.qnv import QNV
+from frontend.qnv.topology import Topology
+
+
+class _Factor:
+    """An independent part of the distribution: `ctx`, over the variables `vars` and the nodes `nodes`."""
+
+    def __init__(self, vars: set, nodes: set, ctx: PConfiguration):
+        self.vars = vars
+        self.nodes = nodes
+        self.ctx = ctx
+
+
+def _union(m1: PMap, m2: PMap) -> PMap:
+    if len(m1) < len(m2):
+        m1, m2 = m2, m1
+    for key, value in m2.items():
+        m1 = m1.set(key, value)
+    return m1
+
+
+def _endpoints(node: Node) -> list[Expression]:
+    """The node expressions of every `cr`, `sw` and `de` statement in a statement."""
+    if isinstance(node, AssignmentCr) or isinstance(node, De):
+        return [node.expr1, node.expr2]
+    if isinstance(node, AssignmentSw):
+        return [node.expr1, node.expr2, node.expr3]
+    if isinstance(node, Expression):
+        return []
+    ret = list()
+    for child in node:
+        ret.extend(_endpoints(child))
+    return ret
+
+
+def _reads(stmt: Statement) -> set[str]:
+    """Variables read by an assignment, a `cr` or a `sw`."""
+    if isinstance(stmt, Assignment):
+        return uses(stmt.expr)
+    if isinstance(stmt, AssignmentCr):
+        return uses(stmt.expr1) | uses(stmt.expr2)
+    return uses(stmt.expr1) | uses(stmt.expr2) | uses(stmt.expr3)
+
+
+def _evaluate(expr: Expression, env: dict):
+    """The value of `expr` under `env`, or `None` if it reads a variable missing from `env`."""
+    if isinstance(expr, IntLiteral):
+        return expr.value
+    if isinstance(expr, Identifier):
+        return env.get(expr.value)
+    if isinstance(expr, Unary):
+        operand = _evaluate(expr.operand, env)
+        return None if operand is None else unary(expr.op, operand)
+    if isinstance(expr, Binary):
+        lhs = _evaluate(expr.lhs, env)
+        rhs = _evaluate(expr.rhs, env)
+        return None if lhs is None or rhs is None else binary(expr.op, lhs, rhs)
+    return None
+
+
+class FactoredQNV:
+    """
+    Computes the same distribution as `QNV` with the `PConfiguration` engine, keeping it factored while possible.
+    Statements inside `if` and `while` run on a single joined factor; only top-level statements are dispatched.
+    `markov_states` and `bound` are passed on to the `QNV` running the statements.
+    """
+
+    def __init__(self, topo: Topology, markov_states: int = 0, bound: Optional[LoopBound] = None):
+        self.topo = topo
+        self.qnv = QNV(topo, PConfiguration, None, markov_states, bound)
+        self.factors = list[_Factor]()
+
+    def analyse(self, program: Program) -> PConfiguration:
+        self.qnv.bound.start()
+        self.factors = list()
+        for stmt in program.children:
+            self.stmt(stmt)
+        return self.join(self.factors).ctx
+
+    def join(self, factors: list[_Factor]) -> _Factor:
+        """The product of independent factors."""
+        ctx = PConfiguration.initial(self.topo)
+        vars = set()
+        nodes = set()
+        for factor in factors:
+            joined = PConfiguration()
+            joined.uniform = {**ctx.uniform, **factor.ctx.uniform}
+            for d1 in ctx:
+                for d2 in factor.ctx:
+                    joined.add(DConfiguration(
+                        _union(d1.mem, d2.mem),
+                        Entanglement(self.topo.n, _union(d1.ent.links, d2.ent.links)),
+                        d1.prob * d2.prob,
+                    ))
+            ctx = joined
+            vars |= factor.vars
+            nodes |= factor.nodes
+        return _Factor(vars, nodes, ctx)
+
+    def _uniform(self) -> dict:
+        """Variables that have a single value in their factor."""
+        ret = dict()
+        for factor in self.factors:
+            ret.update(factor.ctx.uniform)
+        return ret
+
+    def _drop(self, ident: str) -> None:
+        """Forget the current value of `ident`, which is about to be overwritten without being read."""
+        for factor in self.factors:
+            if ident in factor.vars:
+                factor.ctx.forget([ident], False)
+                factor.vars.discard(ident)
+
+    def stmt(self, stmt: Statement) -> None:
+        if isinstance(stmt, (Assignment, AssignmentCr, AssignmentSw)) and stmt.ident.value not in _reads(stmt):
+            self._drop(stmt.ident.value)
+
+        written = defs(stmt)
+        uniform = {ident: value for ident, value in self._uniform().items() if ident not in written}
+        mentioned = variables(stmt)
+        lent = {ident for ident in mentioned if ident in uniform}
+        needed = mentioned - lent
+
+        nodes = set()
+        for expr in _endpoints(stmt):
+            value = _evaluate(expr, uniform)
+            if value is None:
+                nodes = None
+                break
+            nodes.add(value)
+
+        chosen = list()
+        rest = list()
+        for factor in self.factors:
+            if nodes is None or factor.vars & needed or factor.nodes & nodes:
+                chosen.append(factor)
+            else:
+                rest.append(factor)
+        factor = self.join(chosen)
+        lent = {ident for ident in lent if ident not in factor.vars}
+        for ident in lent:
+            factor.ctx.uniform[ident] = uniform[ident]
+
+        stmt.accept(self.qnv, factor.ctx)
+
+        factor.ctx.forget(list(lent), False)
+        factor.vars |= needed
+        if isinstance(stmt, Forget):
+            factor.vars -= {ident.value for ident in stmt.ident_list.children}
+        factor.nodes |= nodes if nodes is not None else set(range(1, self.topo.n + 1))
+        self.factors = rest + ([factor] if factor.vars or factor.nodes or not self._trivial(factor.ctx) else [])
+
+    @staticmethod
+    def _trivial(ctx: PConfiguration) -> bool:
+        """Whether a distribution is the initial one, i.e. a neutral factor of the product."""
+        if len(ctx) != 1 or ctx.uniform:
+            return False
+        dconf = next(iter(ctx))
+        return dconf.prob == 1.0 and len(dconf.mem) == 0 and len(dconf.ent.links) == 0
@@ -0,0 +1,106 @@
+"""
+Module that lets tools observe the analysis of a QNV program statement by statement.
+
+`Hooks` is the interface of an observer: `before` and `after` are called around every statement
+(those nested in `if` and `while` included), `branch` every time an `if`, a `while` test or an assertion
+splits the distribution, and `outcomes` every time a `cr` or an `sw` splits every configuration
+into a success and a failure.
+`HookedQNV` is the `QNV` that calls them; `QNV` itself never does, so that analyses nobody observes
+pay nothing for the feature. For the same reason, `HookedQNV` alone runs on engines that count the configurations
+merged into equal ones, in their class attribute `merges`.
+"""
+
+from typing import Optional
+
+from frontend.ast.tree import *
+from frontend.qnv.batch import BatchConfiguration
+from frontend.qnv.bounds import LoopBound
+from frontend.qnv.configuration import DConfiguration, PConfiguration
+from frontend.qnv.pruning import Pruner
+from frontend.qnv.qnv import QNV
+from frontend.qnv.topology import Topology
+
+
+class Hooks:
+    """Observer of an analysis. Every hook does nothing by default; override the ones needed."""
+
+    def before(self, stmt: Statement, ctx: PConfiguration) -> None:
+        """Called before `stmt` runs on `ctx`."""
+
+    def after(self, stmt: Statement, ctx: PConfiguration) -> None:
+        """Called after `stmt` ran, with the resulting distribution `ctx`."""
+
+    def branch(self, stmt: Statement, taken: PConfiguration, other: PConfiguration) -> None:
+        """
+        Called when the test of `stmt` splits a distribution: `taken` satisfies it
+        (the `then` branch, the loop body, the configurations kept by an assertion), `other` does not.
+        """
+
+    def outcomes(self, stmt: Statement, confs_in: int, confs_out: int) -> None:
+        """
+        Called after the `cr` or `sw` statement `stmt` turned `confs_in` configurations into `confs_out`,
+        successes and failures merged. The distribution is not split again to tell them apart.
+        """
+
+
+class _CountingPConfiguration(PConfiguration):
+    """`PConfiguration` counting the configurations merged into an equal one so far, in this process."""
+
+    merges = 0
+
+    def add(self, dconf: DConfiguration) -> None:
+        count = len(self.dconfs)
+        super().add(dconf)
+        if len(self.dconfs) == count:
+            _CountingPConfiguration.merges = _CountingPConfiguration.merges + 1
+
+
+class _CountingBatchConfiguration(BatchConfiguration):
+    """`BatchConfiguration` counting the rows merged into an equal one so far, in this process."""
+
+    merges = 0
+
+    def _merge_duplicates(self) -> None:
+        count = len(self)
+        super()._merge_duplicates()
+        _CountingBatchConfiguration.merges = _CountingBatchConfiguration.merges + count - len(self)
+
+
+_COUNTING = {PConfiguration: _CountingPConfiguration, BatchConfiguration: _CountingBatchConfiguration}
+
+
+class HookedQNV(QNV):
+    """`QNV` calling `hooks` during the analysis. The other arguments are those of `QNV`."""
+
+    def __init__(
+        self,
+        hooks: Hooks,
+        topo: Topology,
+        engine=PConfiguration,
+        pruner: Optional[Pruner] = None,
+        markov_states: int = 0,
+        bound: Optional[LoopBound] = None,
+    ):
+        super().__init__(topo, _COUNTING.get(engine, engine), pruner, markov_states, bound)
+        self.hooks = hooks
+
+    def visitProgram(self, program: Program, ctx: PConfiguration) -> None:
+        for stmt in program.children:
+            self.hooks.before(stmt, ctx)
+            stmt.accept(self, ctx)
+            self.hooks.after(stmt, ctx)
+
+    def split(self, stmt: Statement, ctx: PConfiguration, retc) -> tuple[PConfiguration, PConfiguration]:
+        taken, other = ctx.split(retc)
+        self.hooks.branch(stmt, taken, other)
+        return taken, other
+
+    def visitAssignmentCr(self, stmt: AssignmentCr, ctx: PConfiguration) -> None:
+        confs_in = len(ctx)
+        super().visitAssignmentCr(stmt, ctx)
+        self.hooks.outcomes(stmt, confs_in, len(ctx))
+
+    def visitAssignmentSw(self, stmt: AssignmentSw, ctx: PConfiguration) -> None:
+        confs_in = len(ctx)
+        super().visitAssignmentSw(stmt, ctx)
+        self.hooks.outcomes(stmt, confs_in, len(ctx))
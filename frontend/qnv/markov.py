@@ -0,0 +1,40 @@
+"""
+Module that solves `while` loops exactly as absorbing Markov chains.
+
+The states of the chain are the configurations reaching the loop head.
+A state where the condition does not hold is absorbing (it leaves the loop),
+and every other state moves to the configurations the loop body turns it into.
+If `Q[i][j]` is the probability of moving from state `i` to state `j` in one iteration
+and `v` is the initial distribution, the expected number of visits `x` of every state satisfies
+`x = v + x Q`, so `x` solves `(I - Q)^T x = v`. The mass leaving the loop from an absorbing state is its `x`.
+"""
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix, identity
+    from scipy.sparse.linalg import spsolve
+except ImportError:
+    spsolve = None
+
+
+def solve_visits(n: int, rows: list, cols: list, vals: list, initial) -> np.ndarray:
+    """
+    Solve `(I - Q)^T x = initial`, where `Q` is given in coordinate form.
+    Uses a sparse solver if SciPy is available, a dense one otherwise.
+    Returns `None` if the system is singular, i.e. some states never leave the loop.
+    """
+    if spsolve is not None:
+        q = csr_matrix((vals, (cols, rows)), shape=(n, n))
+        x = spsolve((identity(n, format="csr") - q).tocsc(), np.asarray(initial, dtype=float))
+    else:
+        a = np.eye(n)
+        np.subtract.at(a, (cols, rows), vals)
+        try:
+            x = np.linalg.solve(a, np.asarray(initial, dtype=float))
+        except np.linalg.LinAlgError:
+            return None
+    x = np.atleast_1d(x)
+    if not np.all(np.isfinite(x)):
+        return None
+    return x
@@ -0,0 +1,275 @@
+"""
+Module that estimates the semantic function of a QNV program by Monte Carlo simulation.
+
+Instead of enumerating every configuration, the program is run on one concrete trajectory at a time:
+the outcome of each `cr` and `sw` is drawn according to the topology, and a failed assertion rejects the trajectory.
+Trajectories are simulated in rounds spread over a process pool, each worker with its own independent RNG stream,
+until the requested precision (or number of samples) is reached.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Optional
+
+import numpy as np
+
+from frontend.ast.tree import Program
+from frontend.qnv.bounds import LoopBound
+from frontend.qnv.configuration import DConfiguration, PConfiguration
+from frontend.qnv.entanglement import Entanglement
+from frontend.qnv.persistent import PMap
+from frontend.qnv.qnv import QNV
+from frontend.qnv.topology import Topology
+
+
+class TrajectoryConfiguration:
+    """
+    A distribution concentrated on a single configuration (or empty, once the trajectory is rejected).
+    It implements the same interface as `PConfiguration`, so that `QNV` can drive it,
+    but `cr` and `sw` draw one of their outcomes at random instead of branching.
+    """
+
+    def __init__(self, rng: np.random.Generator, dconf: Optional[DConfiguration] = None):
+        self.rng = rng
+        self.dconf = dconf
+
+    def __len__(self) -> int:
+        return 0 if self.dconf is None else 1
+
+    def empty(self) -> TrajectoryConfiguration:
+        return TrajectoryConfiguration(self.rng)
+
+    def merge(self, other: TrajectoryConfiguration) -> None:
+        if self.dconf is None:
+            self.dconf = other.dconf
+
+    def load(self, other: TrajectoryConfiguration) -> None:
+        self.dconf = other.dconf
+
+    def split(self, conds) -> tuple[TrajectoryConfiguration, TrajectoryConfiguration]:
+        if self.dconf is None:
+            return self.empty(), self.empty()
+        if np.broadcast_to(np.not_equal(conds, 0), (1,))[0]:
+            return TrajectoryConfiguration(self.rng, self.dconf), self.empty()
+        return self.empty(), TrajectoryConfiguration(self.rng, self.dconf)
+
+    def lookup(self, ident: str):
+        return np.array([self.dconf.mem[ident]] if self.dconf is not None else [])
+
+    def probabilities(self):
+        return np.ones(len(self))
+
+    def total(self) -> float:
+        return float(len(self))
+
+    @staticmethod
+    def _value(values):
+        return np.broadcast_to(values, (1,)).tolist()[0]
+
+    def _draw(self, pconf: PConfiguration) -> None:
+        """Pick one configuration of `pconf` according to the probabilities."""
+        dconfs = list(pconf)
+        dconf = dconfs[-1]
+        if len(dconfs) > 1:
+            u = self.rng.random() * sum(d.prob for d in dconfs)
+            for d in dconfs:
+                u = u - d.prob
+                if u < 0:
+                    dconf = d
+                    break
+        dconf.prob = 1.0
+        self.dconf = dconf
+
+    def assign(self, ident: str, values) -> None:
+        if self.dconf is not None:
+            self.dconf.mem = self.dconf.mem.set(ident, self._value(values))
+
+    def cr(self, ident: str, values1, values2, topo: Topology) -> None:
+        if self.dconf is not None:
+            pconf = PConfiguration()
+            self.dconf.cr(ident, self._value(values1), self._value(values2), topo, pconf)
+            self._draw(pconf)
+
+    def sw(self, ident: str, values1, values2, values3, topo: Topology) -> None:
+        if self.dconf is not None:
+            pconf = PConfiguration()
+            self.dconf.sw(ident, self._value(values1), self._value(values2), self._value(values3), topo, pconf)
+            self._draw(pconf)
+
+    def de(self, values1, values2, topo: Topology) -> None:
+        if self.dconf is not None:
+            pconf = PConfiguration()
+            self.dconf.de(self._value(values1), self._value(values2), topo, pconf)
+            self._draw(pconf)
+
+    def forget(self, idents: list, strict: bool = True) -> None:
+        if self.dconf is not None:
+            for ident in idents:
+                self.dconf.mem = self.dconf.mem.remove(ident) if strict else self.dconf.mem.discard(ident)
+
+
+class Sampler:
+    """
+    Plays the role of the engine class for `QNV`: every call to `initial` starts a new trajectory.
+    """
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+
+    def initial(self, topo: Topology) -> TrajectoryConfiguration:
+        return TrajectoryConfiguration(self.rng, DConfiguration(PMap(), Entanglement(topo.n)))
+
+
+# State of a worker process, set up once by `_init_worker`.
+_worker_state = dict()
+
+
+def _init_worker(topo: Topology, program: Program, bound: LoopBound) -> None:
+    _worker_state["topo"] = topo
+    _worker_state["program"] = program
+    _worker_state["bound"] = bound
+
+
+def _simulate(seed: np.random.SeedSequence, samples: int) -> tuple[Counter, int, int]:
+    """
+    Simulate `samples` trajectories. Returns how many times each final state was reached,
+    keyed by plain tuples (so that they do not depend on the hashing of the worker),
+    the number of rejections, and the number of trajectories cut by the loop bound.
+    """
+    topo = _worker_state["topo"]
+    bound = _worker_state["bound"]
+    qnv = QNV(topo, Sampler(np.random.default_rng(seed)), bound=bound)
+    counts = Counter()
+    rejected = 0
+    unresolved = 0
+    for _ in range(0, samples):
+        cuts = bound.cuts
+        res = qnv.analyse(_worker_state["program"])
+        if bound.cuts > cuts:
+            unresolved = unresolved + 1
+        elif res.dconf is None:
+            rejected = rejected + 1
+        else:
+            counts[(tuple(res.dconf.mem.to_dict().items()), tuple(sorted(res.dconf.ent.links.items())))] += 1
+    return counts, rejected, unresolved
+
+
+def wilson(count: int, total: int, confidence: float) -> tuple[float, float]:
+    """Wilson score interval of a binomial proportion."""
+    if total == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    p = count / total
+    denom = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denom
+    half = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denom
+    return (max(0.0, center - half) if count > 0 else 0.0), (min(1.0, center + half) if count < total else 1.0)
+
+
+class MonteCarloResult:
+    def __init__(self, n: int, counts: Counter, rejected: int, unresolved: int, samples: int, confidence: float):
+        self.n = n
+        self.counts = counts
+        self.rejected = rejected
+        self.unresolved = unresolved
+        self.samples = samples
+        self.confidence = confidence
+
+    def estimates(self):
+        """Yields `(estimate, (low, high), mem, links)` for every reached state, most frequent first."""
+        for (mem, links), count in self.counts.most_common():
+            yield count / self.samples, wilson(count, self.samples, self.confidence), dict(mem), dict(links)
+
+    def half_width(self) -> float:
+        """Largest half-width of the confidence intervals, including those of rejection and of unresolved loops."""
+        counts = list(self.counts.values()) + [self.rejected, self.unresolved]
+        return max((hi - lo) / 2 for lo, hi in (wilson(c, self.samples, self.confidence) for c in counts))
+
+    def print(self):
+        for p, (lo, hi), mem, links in self.estimates():
+            print(f"{p} [{lo}, {hi}]")
+            print(mem)
+            print(Entanglement(self.n, PMap(links)))
+            print('')
+        lo, hi = wilson(self.rejected, self.samples, self.confidence)
+        print(f"Rejected: {self.rejected / self.samples} [{lo}, {hi}]")
+        if self.unresolved:
+            lo, hi = wilson(self.unresolved, self.samples, self.confidence)
+            print(f"Unresolved (loop bound reached): {self.unresolved / self.samples} [{lo}, {hi}]")
+        print(f"Samples: {self.samples}, confidence level: {self.confidence}")
+
+
+class MonteCarlo:
+    """
+    `samples`: maximum number of trajectories.
+    `precision`: stop as soon as every confidence interval has at most this half-width (0 disables early stopping).
+    `confidence`: confidence level of the Wilson intervals.
+    `workers`: number of worker processes (1 simulates in this process).
+    `batch`: number of trajectories of a batch. Every worker simulates one batch per round.
+    `bound`: loop bound applied to every trajectory. Trajectories it cuts are reported as unresolved.
+    `seed`: seed of the root `np.random.SeedSequence`. Batch `i` draws from the `i`-th seed spawned from it,
+    and batches are accounted for in order, the stopping test running after each of them,
+    so that runs with the same seed draw the same trajectories, whatever the number of workers.
+    """
+
+    def __init__(
+        self,
+        topo: Topology,
+        samples: int = 10000,
+        precision: float = 0.0,
+        confidence: float = 0.95,
+        workers: int = 1,
+        batch: int = 1000,
+        seed: Optional[int] = None,
+        bound: Optional[LoopBound] = None,
+    ):
+        self.topo = topo
+        self.samples = samples
+        self.precision = precision
+        self.confidence = confidence
+        self.workers = workers
+        self.batch = batch
+        self.seed = seed
+        self.bound = bound if bound is not None else LoopBound()
+
+    def analyse(self, program: Program) -> MonteCarloResult:
+        root = np.random.SeedSequence(self.seed)
+        counts = Counter()
+        rejected = 0
+        unresolved = 0
+        total = 0
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.topo, program, self.bound))
+        else:
+            _init_worker(self.topo, program, self.bound)
+        try:
+            while total < self.samples:
+                sizes = [min(self.batch, self.samples - total - i * self.batch) for i in range(0, self.workers)]
+                sizes = [size for size in sizes if size > 0]
+                seeds = root.spawn(len(sizes))
+                if pool is None:
+                    results = [_simulate(seed, size) for seed, size in zip(seeds, sizes)]
+                else:
+                    results = list(pool.map(_simulate, seeds, sizes))
+                done = False
+                for size, (c, r, u) in zip(sizes, results):
+                    counts.update(c)
+                    rejected = rejected + r
+                    unresolved = unresolved + u
+                    total = total + size
+                    result = MonteCarloResult(self.topo.n, counts, rejected, unresolved, total, self.confidence)
+                    # batches past the stopping point are dropped, so that it does not depend on the number of workers
+                    if self.precision > 0 and result.half_width() <= self.precision:
+                        done = True
+                        break
+                if done:
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return result
@@ -0,0 +1,66 @@
+"""
+Module that evaluates QNV operators over columns of values.
+An operand is either a scalar (e.g. an integer literal), which is broadcast to every configuration,
+or a 1-D NumPy array holding one value per configuration.
+"""
+
+import numpy as np
+
+from frontend.ast.node import BinaryOp, UnaryOp
+
+
+def _logic_not(operand):
+    return np.equal(operand, 0).astype(np.int64)
+
+
+def _truth(f):
+    return lambda lhs, rhs: f(np.not_equal(lhs, 0), np.not_equal(rhs, 0)).astype(np.int64)
+
+
+def _compare(f):
+    return lambda lhs, rhs: f(lhs, rhs).astype(np.int64)
+
+
+def _div(lhs, rhs):
+    """
+    Floor division. Division by zero yields `None` for the configurations concerned,
+    which are found with a mask so that the common case costs a single `np.floor_divide`.
+    """
+    zero = np.equal(rhs, 0)
+    if not np.any(zero):
+        return np.floor_divide(lhs, rhs)
+    ret = np.floor_divide(lhs, np.where(zero, 1, rhs))
+    if np.ndim(ret) == 0:
+        return None
+    ret = ret.astype(object)
+    ret[np.broadcast_to(zero, ret.shape)] = None
+    return ret
+
+
+UNARY_OPS = {
+    UnaryOp.Neg: np.negative,
+    UnaryOp.LogicNot: _logic_not,
+}
+
+BINARY_OPS = {
+    BinaryOp.Add: np.add,
+    BinaryOp.Sub: np.subtract,
+    BinaryOp.Mul: np.multiply,
+    BinaryOp.Div: _div,
+    BinaryOp.LogicOr: _truth(np.logical_or),
+    BinaryOp.LogicAnd: _truth(np.logical_and),
+    BinaryOp.EQ: _compare(np.equal),
+    BinaryOp.NE: _compare(np.not_equal),
+    BinaryOp.LT: _compare(np.less),
+    BinaryOp.LE: _compare(np.less_equal),
+    BinaryOp.GT: _compare(np.greater),
+    BinaryOp.GE: _compare(np.greater_equal),
+}
+
+
+def unary(op: UnaryOp, operand):
+    return UNARY_OPS[op](operand)
+
+
+def binary(op: BinaryOp, lhs, rhs):
+    return BINARY_OPS[op](lhs, rhs)
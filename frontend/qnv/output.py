@@ -0,0 +1,90 @@
+"""
+Module that writes the result of an analysis in machine-readable formats.
+
+Writers consume the `(prob, mem, links)` records generated by `records()` (see `PConfiguration.records`)
+one at a time, so that no text is built for the whole distribution:
+
+NDJSON: one JSON object per configuration and line, `{"prob": p, "mem": {...}, "ent": [[x, y, count], ...]}`,
+    plus `"interval": [p, p + slack]` if some probability mass was discarded or left unresolved.
+NPZ: NumPy arrays in columnar form, `ent` and `mem` in coordinate form:
+    `prob` (one row per configuration, one column per topology if there are several),
+    `names` (the variables), `mem_row`, `mem_var`, `mem_val` (configuration, index in `names`, value),
+    `mem_defined` (whether the value is defined: `False`, with `mem_val` 0, after a division by zero),
+    `ent_row`, `ent_x`, `ent_y`, `ent_count` (configuration, nodes, number of pairs), and the scalars `n` and `slack`.
+"""
+
+import heapq
+import json
+import sys
+from array import array
+
+import numpy as np
+
+
+def _key(record) -> float:
+    """Sort key of a record: its probability, or its largest probability over a batch of topologies."""
+    return float(np.max(record[0]))
+
+
+def select(records, sort_prob: bool = False, top: int = 0):
+    """
+    The `top` most probable records (all of them if `top` is 0), in decreasing order of probability if `sort_prob`
+    or `top` is set. Otherwise records stream through; keeping the top `top` needs memory for `top` records only.
+    """
+    if top > 0:
+        return heapq.nlargest(top, records, key=_key)
+    if sort_prob:
+        return sorted(records, key=_key, reverse=True)
+    return records
+
+
+def _prob(prob):
+    return np.asarray(prob, dtype=float).tolist()
+
+
+def write_ndjson(records, path: str, slack=0.0) -> None:
+    f = sys.stdout if path == "-" else open(path, "w")
+    try:
+        for prob, mem, links in records:
+            record = {"prob": _prob(prob), "mem": mem, "ent": [list(link) for link in links]}
+            if slack:
+                record["interval"] = [_prob(prob), _prob(prob + slack)]
+            f.write(json.dumps(record, separators=(",", ":")))
+            f.write("\n")
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def write_npz(records, path: str, n: int, slack=0.0) -> None:
+    probs = list()
+    names = dict()
+    mem_row, mem_var, mem_val, mem_defined = array("q"), array("q"), array("q"), array("b")
+    ent_row, ent_x, ent_y, ent_count = array("q"), array("q"), array("q"), array("q")
+    for row, (prob, mem, links) in enumerate(records):
+        probs.append(prob)
+        for name, value in mem.items():
+            mem_row.append(row)
+            mem_var.append(names.setdefault(name, len(names)))
+            mem_val.append(0 if value is None else value)
+            mem_defined.append(value is not None)
+        for x, y, cnt in links:
+            ent_row.append(row)
+            ent_x.append(x)
+            ent_y.append(y)
+            ent_count.append(cnt)
+    np.savez(
+        path,
+        prob=np.array(probs, dtype=float),
+        names=np.array(list(names), dtype=str),
+        mem_row=np.frombuffer(mem_row, dtype=np.int64),
+        mem_var=np.frombuffer(mem_var, dtype=np.int64),
+        mem_val=np.frombuffer(mem_val, dtype=np.int64),
+        mem_defined=np.frombuffer(mem_defined, dtype=np.int8).astype(bool),
+        ent_row=np.frombuffer(ent_row, dtype=np.int64),
+        ent_x=np.frombuffer(ent_x, dtype=np.int64),
+        ent_y=np.frombuffer(ent_y, dtype=np.int64),
+        ent_count=np.frombuffer(ent_count, dtype=np.int64),
+        n=n,
+        slack=slack,
+    )
@@ -0,0 +1,232 @@
+"""
+Module that defines `PMap`, a persistent (immutable) map implemented as a hash array mapped trie.
+
+Updating a `PMap` returns a new map that shares all untouched subtrees with the old one,
+so it costs O(log32 n) time and memory instead of the O(n) of copying a dict.
+A `PMap` also maintains an order-independent hash of its items incrementally,
+which makes it cheap to use as (part of) a dictionary key.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_HASH_MASK = (1 << _HASH_BITS) - 1
+
+_MISSING = object()
+
+
+def _hash(key) -> int:
+    return hash(key) & _HASH_MASK
+
+
+class _Node:
+    """
+    An inner node of the trie.
+    `entries` holds, in bit order, one entry per bit set in `bitmap`:
+    either a `(key, value)` tuple or a child node.
+    """
+
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: tuple) -> None:
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+class _Collision:
+    """A node holding `(key, value)` pairs whose keys have exactly the same hash."""
+
+    __slots__ = ("pairs",)
+
+    def __init__(self, pairs: tuple) -> None:
+        self.pairs = pairs
+
+
+_EMPTY = _Node(0, ())
+
+
+def _pair_node(k1, v1, h1: int, k2, v2, h2: int, shift: int):
+    """A node holding two entries with different keys."""
+    if shift >= _HASH_BITS:
+        return _Collision(((k1, v1), (k2, v2)))
+    i1 = (h1 >> shift) & _MASK
+    i2 = (h2 >> shift) & _MASK
+    if i1 == i2:
+        return _Node(1 << i1, (_pair_node(k1, v1, h1, k2, v2, h2, shift + _BITS),))
+    if i1 < i2:
+        return _Node((1 << i1) | (1 << i2), ((k1, v1), (k2, v2)))
+    return _Node((1 << i1) | (1 << i2), ((k2, v2), (k1, v1)))
+
+
+def _get(node, key, h: int, default):
+    shift = 0
+    while True:
+        if isinstance(node, _Collision):
+            for k, v in node.pairs:
+                if k == key:
+                    return v
+            return default
+        bit = 1 << ((h >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return default
+        entry = node.entries[(node.bitmap & (bit - 1)).bit_count()]
+        if isinstance(entry, tuple):
+            return entry[1] if entry[0] == key else default
+        node = entry
+        shift = shift + _BITS
+
+
+def _set(node, key, value, h: int, shift: int):
+    """Returns the updated node and the replaced value (`_MISSING` if `key` was absent)."""
+    if isinstance(node, _Collision):
+        pairs = list(node.pairs)
+        for i, (k, v) in enumerate(pairs):
+            if k == key:
+                pairs[i] = (key, value)
+                return _Collision(tuple(pairs)), v
+        return _Collision(tuple(pairs) + ((key, value),)), _MISSING
+    bit = 1 << ((h >> shift) & _MASK)
+    pos = (node.bitmap & (bit - 1)).bit_count()
+    entries = node.entries
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, entries[:pos] + ((key, value),) + entries[pos:]), _MISSING
+    entry = entries[pos]
+    if isinstance(entry, tuple):
+        if entry[0] == key:
+            new_entry, old = (key, value), entry[1]
+        else:
+            new_entry = _pair_node(entry[0], entry[1], _hash(entry[0]), key, value, h, shift + _BITS)
+            old = _MISSING
+    else:
+        new_entry, old = _set(entry, key, value, h, shift + _BITS)
+    return _Node(node.bitmap, entries[:pos] + (new_entry,) + entries[pos + 1:]), old
+
+
+def _remove(node, key, h: int, shift: int):
+    """Returns the updated node (`None` if it became empty) and the removed value (`_MISSING` if absent)."""
+    if isinstance(node, _Collision):
+        pairs = tuple(pair for pair in node.pairs if pair[0] != key)
+        if len(pairs) == len(node.pairs):
+            return node, _MISSING
+        old = next(v for k, v in node.pairs if k == key)
+        return (_Collision(pairs) if pairs else None), old
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node, _MISSING
+    pos = (node.bitmap & (bit - 1)).bit_count()
+    entry = node.entries[pos]
+    if isinstance(entry, tuple):
+        if entry[0] != key:
+            return node, _MISSING
+        new_entry, old = None, entry[1]
+    else:
+        new_entry, old = _remove(entry, key, h, shift + _BITS)
+        if old is _MISSING:
+            return node, _MISSING
+    if new_entry is None:
+        bitmap = node.bitmap & ~bit
+        if bitmap == 0:
+            return None, old
+        return _Node(bitmap, node.entries[:pos] + node.entries[pos + 1:]), old
+    return _Node(node.bitmap, node.entries[:pos] + (new_entry,) + node.entries[pos + 1:]), old
+
+
+def _items(node) -> Iterator[tuple]:
+    if isinstance(node, _Collision):
+        yield from node.pairs
+        return
+    for entry in node.entries:
+        if isinstance(entry, tuple):
+            yield entry
+        else:
+            yield from _items(entry)
+
+
+class PMap:
+    """
+    Persistent map. `set` and `remove` return new maps and leave `self` unchanged.
+    Equal maps have equal hashes regardless of the order in which their items were inserted.
+    """
+
+    __slots__ = ("_root", "_len", "_hash")
+
+    def __init__(self, items=None) -> None:
+        self._root = _EMPTY
+        self._len = 0
+        self._hash = 0
+        if items is not None:
+            m = self
+            for key, value in (items.items() if isinstance(items, dict) else items):
+                m = m.set(key, value)
+            self._root, self._len, self._hash = m._root, m._len, m._hash
+
+    @staticmethod
+    def _make(root, length: int, h: int) -> PMap:
+        m = PMap.__new__(PMap)
+        m._root = root
+        m._len = length
+        m._hash = h
+        return m
+
+    def get(self, key, default=None) -> Any:
+        return _get(self._root, key, _hash(key), default)
+
+    def __getitem__(self, key) -> Any:
+        value = _get(self._root, key, _hash(key), _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return _get(self._root, key, _hash(key), _MISSING) is not _MISSING
+
+    def set(self, key, value) -> PMap:
+        root, old = _set(self._root, key, value, _hash(key), 0)
+        h = self._hash + hash((key, value))
+        if old is _MISSING:
+            return PMap._make(root, self._len + 1, h & _HASH_MASK)
+        return PMap._make(root, self._len, (h - hash((key, old))) & _HASH_MASK)
+
+    def remove(self, key) -> PMap:
+        """Remove `key`, which must be present."""
+        root, old = _remove(self._root, key, _hash(key), 0)
+        if old is _MISSING:
+            raise KeyError(key)
+        return PMap._make(root if root is not None else _EMPTY, self._len - 1, (self._hash - hash((key, old))) & _HASH_MASK)
+
+    def discard(self, key) -> PMap:
+        """Remove `key` if present."""
+        return self.remove(key) if key in self else self
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        for key, _ in _items(self._root):
+            yield key
+
+    def items(self) -> Iterator[tuple]:
+        return _items(self._root)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PMap):
+            return NotImplemented
+        if self._len != other._len or self._hash != other._hash:
+            return False
+        if self._root is other._root:
+            return True
+        return all(other.get(key, _MISSING) == value for key, value in self.items())
+
+    def to_dict(self) -> dict:
+        """A plain dict of the items, sorted by key so that the result does not depend on hashing."""
+        return dict(sorted(self.items(), key=lambda item: item[0]))
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
@@ -0,0 +1,136 @@
+"""
+Module that profiles the analysis of a QNV program statement by statement.
+
+`Profiler` is a `Hooks` observer (see `frontend.qnv.hooks`) that records, for every statement of the AST:
+the number of times it ran, its wall time (inclusive, and excluding the statements nested in it),
+the number of configurations before and after it, the number of configurations merged into equal ones
+while it ran, and the probability mass its assertions dropped.
+`print_table` aggregates these by source line; `write_trace` writes every run of every statement
+as a timeline in the Chrome trace event format, to open in `chrome://tracing` or Perfetto.
+"""
+
+import json
+import sys
+import time
+
+import numpy as np
+
+from frontend.ast.tree import *
+from frontend.qnv.hooks import Hooks
+
+
+def _mass(prob) -> float:
+    """A probability mass as a number: the largest one over a batch of topologies."""
+    return float(np.max(prob)) if np.ndim(prob) else float(prob)
+
+
+def _merges(ctx) -> int:
+    """Configurations merged so far by the engine of `ctx`, which counts them when run by a `HookedQNV`."""
+    return getattr(type(ctx), "merges", 0)
+
+
+class _Stats:
+    """What `Profiler` recorded about one statement, or about one source line."""
+
+    def __init__(self, line, name: str):
+        self.line = line
+        self.name = name
+        self.calls = 0
+        self.time = 0  # ns, statements nested in this one included
+        self.self_time = 0  # ns, statements nested in this one excluded
+        self.confs_in = 0
+        self.confs_out = 0
+        self.merges = 0  # statements nested in this one excluded
+        self.dropped = 0.0
+
+    def add(self, other: "_Stats") -> None:
+        self.calls = self.calls + other.calls
+        self.time = self.time + other.time
+        self.self_time = self.self_time + other.self_time
+        self.confs_in = self.confs_in + other.confs_in
+        self.confs_out = self.confs_out + other.confs_out
+        self.merges = self.merges + other.merges
+        self.dropped = self.dropped + other.dropped
+
+    def branching(self) -> float:
+        """Average number of configurations out per configuration in."""
+        return self.confs_out / self.confs_in if self.confs_in else 0.0
+
+
+class Profiler(Hooks):
+    """
+    Records per-statement statistics of an analysis run by a `HookedQNV`.
+    Every run of every statement is also kept as a trace event if `trace` is set.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.stats = dict[int, _Stats]()
+        self.trace = trace
+        self.events = list()
+        # one frame per statement running: [stmt, start, configurations in, merges at start, nested time, nested merges]
+        self.stack = list()
+        self.origin = time.perf_counter_ns()
+
+    def _stats(self, stmt: Statement) -> _Stats:
+        ret = self.stats.get(id(stmt))
+        if ret is None:
+            ret = self.stats[id(stmt)] = _Stats(stmt.getattr("lineno"), stmt.name)
+        return ret
+
+    def before(self, stmt: Statement, ctx) -> None:
+        self.stack.append([stmt, time.perf_counter_ns(), len(ctx), _merges(ctx), 0, 0])
+
+    def after(self, stmt: Statement, ctx) -> None:
+        end = time.perf_counter_ns()
+        _, start, confs_in, merges, nested_time, nested_merges = self.stack.pop()
+        elapsed = end - start
+        merged = _merges(ctx) - merges
+        stats = self._stats(stmt)
+        stats.calls = stats.calls + 1
+        stats.time = stats.time + elapsed
+        stats.self_time = stats.self_time + elapsed - nested_time
+        stats.confs_in = stats.confs_in + confs_in
+        stats.confs_out = stats.confs_out + len(ctx)
+        stats.merges = stats.merges + merged - nested_merges
+        if self.stack:
+            self.stack[-1][4] = self.stack[-1][4] + elapsed
+            self.stack[-1][5] = self.stack[-1][5] + merged
+        if self.trace:
+            self.events.append({
+                "name": stmt.name if stats.line is None else f"{stmt.name} (line {stats.line})",
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": elapsed / 1000,
+                "pid": 0,
+                "tid": 0,
+                "args": {"in": confs_in, "out": len(ctx), "merges": merged},
+            })
+
+    def branch(self, stmt: Statement, taken, other) -> None:
+        if isinstance(stmt, Assertion) and len(other) > 0:
+            stats = self._stats(stmt)
+            stats.dropped = stats.dropped + _mass(other.total())
+
+    def lines(self) -> list[_Stats]:
+        """Statistics aggregated by source line, in line order (statements without a line last)."""
+        ret = dict()
+        for stats in self.stats.values():
+            line = ret.get(stats.line)
+            if line is None:
+                line = ret[stats.line] = _Stats(stats.line, stats.name)
+            elif stats.name not in line.name.split(","):
+                line.name = f"{line.name},{stats.name}"
+            line.add(stats)
+        return sorted(ret.values(), key=lambda stats: (stats.line is None, stats.line or 0))
+
+    def print_table(self, file=sys.stderr) -> None:
+        print(f"{'line':>6} {'statement':<12} {'calls':>8} {'time ms':>10} {'self ms':>10} "
+              f"{'confs in':>10} {'confs out':>10} {'branching':>10} {'merges':>10} {'dropped':>10}", file=file)
+        for stats in self.lines():
+            print(f"{stats.line if stats.line is not None else '-':>6} {stats.name:<12} {stats.calls:>8} "
+                  f"{stats.time / 1e6:>10.3f} {stats.self_time / 1e6:>10.3f} {stats.confs_in:>10} {stats.confs_out:>10} "
+                  f"{stats.branching():>10.3f} {stats.merges:>10} {stats.dropped:>10.4g}", file=file)
+
+    def write_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
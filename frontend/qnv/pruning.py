@@ -0,0 +1,40 @@
+import numpy as np
+
+
+class Pruner:
+    """
+    Drops improbable configurations during the analysis and keeps track of the probability mass it discarded.
+
+    `eps`: configurations whose probability is below `eps` are dropped.
+    `budget`: the least probable configurations are dropped as long as the total discarded mass stays within `budget`.
+    `top_k`: at most `top_k` configurations, the most probable ones, are kept (beam search). 0 means no limit.
+
+    Since a dropped configuration could have contributed to any final configuration,
+    every final probability `p` is only known to lie in `[p, p + discarded]`.
+    """
+
+    def __init__(self, eps: float = 0.0, budget: float = 0.0, top_k: int = 0) -> None:
+        self.eps = eps
+        self.budget = budget
+        self.top_k = top_k
+        self.discarded = 0.0
+
+    def __call__(self, ctx) -> None:
+        if len(ctx) == 0:
+            return
+        probs = ctx.probabilities()
+        drop = probs < self.eps
+        remaining = self.budget - self.discarded - probs[drop].sum()
+        if remaining > 0:
+            order = np.argsort(probs, kind="stable")
+            order = order[~drop[order]]
+            tail = order[np.cumsum(probs[order]) <= remaining]
+            drop[tail] = True
+        if self.top_k and len(ctx) - drop.sum() > self.top_k:
+            kept = np.flatnonzero(~drop)
+            beam = kept[np.argpartition(-probs[kept], self.top_k - 1)[:self.top_k]]
+            drop[:] = True
+            drop[beam] = False
+        if drop.any():
+            self.discarded = self.discarded + probs[drop].sum()
+            ctx.load(ctx.split(~drop)[0])
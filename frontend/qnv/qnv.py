@@ -1,18 +1,50 @@
+from typing import Any, Optional
+
 import numpy as np
 
 from frontend.ast.tree import *
 from frontend.ast.visitor import Visitor
-from frontend.ast import node
 from frontend.qnv.topology import Topology
+from frontend.qnv.bounds import LoopBound
 from frontend.qnv.configuration import *
+from frontend.qnv.markov import solve_visits
+from frontend.qnv.operators import binary, unary
+from frontend.qnv.pruning import Pruner
 from utils.error import *
 
-class QNV(Visitor[PConfiguration, list]):
-    def __init__(self, topo: Topology):
+class QNV(Visitor[PConfiguration, Any]):
+    """
+    Computes the semantic function of a QNV program.
+    `engine` is the class used to represent distributions of configurations.
+    It is either `PConfiguration` (one object per configuration)
+    or `BatchConfiguration` (all configurations stored column-wise).
+    `pruner`, if given, is called on the distribution after every branching statement
+    (`cr`, `sw`, `if` and every `while` iteration) and may drop configurations from it.
+    `markov_states`, if positive, makes `while` loops be solved exactly as absorbing Markov chains
+    (see `frontend.qnv.markov`) as long as they reach at most this many distinct states at their head.
+    Loops that cannot be solved this way are unrolled.
+    `bound` decides when unrolling stops (by default, after 1000 iterations of a loop)
+    and accumulates the probability mass left unresolved.
+    """
+
+    def __init__(
+        self,
+        topo: Topology,
+        engine=PConfiguration,
+        pruner: Optional[Pruner] = None,
+        markov_states: int = 0,
+        bound: Optional[LoopBound] = None,
+    ):
         self.topo = topo
+        self.engine = engine
+        self.pruner = pruner
+        self.prune = pruner if pruner is not None else lambda ctx: None
+        self.markov_states = markov_states
+        self.bound = bound if bound is not None else LoopBound()
 
     def analyse(self, program: Program):
-        ctx = PConfiguration([DConfiguration({}, np.zeros((self.topo.n, self.topo.n), dtype=int))])
+        self.bound.start()
+        ctx = self.engine.initial(self.topo)
         program.accept(self, ctx)
         return ctx
     
@@ -20,39 +52,92 @@ class QNV(Visitor[PConfiguration, list]):
         for stmt in program.children:
             stmt.accept(self, ctx)
 
+    def split(self, stmt: Statement, ctx: PConfiguration, retc) -> tuple[PConfiguration, PConfiguration]:
+        """
+        Split `ctx` on the values `retc` of the test of `stmt` (an `if`, a `while` or an assertion):
+        every branch of the analysis goes through here, so that subclasses can observe it (see `frontend.qnv.hooks`).
+        """
+        return ctx.split(retc)
+
     def visitIf(self, stmt: If, ctx: PConfiguration) -> None:
         retc = stmt.cond.accept(self, ctx)
-        ctx1 = PConfiguration(list())
-        ctx0 = PConfiguration(list())
-        for i in range(0, len(ctx.dconfs)):
-            if retc[i] != 0:
-                ctx1.dconfs.append(ctx.dconfs[i])
-            else:
-                ctx0.dconfs.append(ctx.dconfs[i])
+        ctx1, ctx0 = self.split(stmt, ctx, retc)
         stmt.then.accept(self, ctx1)
         stmt.otherwise.accept(self, ctx0)
-        ctx.dconfs = ctx1.dconfs + ctx0.dconfs
+        ctx1.merge(ctx0)
+        ctx.load(ctx1)
+        self.prune(ctx)
 
     def visitWhile(self, stmt: While, ctx: PConfiguration) -> None:
-        ctx0_dconfs = list()
+        if self.markov_states > 0 and self.solve_loop(stmt, ctx):
+            return
+        ctx0 = ctx.empty()
         loop_cnt = 0
         while True:
             retc = stmt.cond.accept(self, ctx)
-            ctx1_dconfs = list()
-            for i in range(0, len(ctx.dconfs)):
-                if retc[i] != 0:
-                    ctx1_dconfs.append(ctx.dconfs[i])
-                else:
-                    ctx0_dconfs.append(ctx.dconfs[i])
-            if len(ctx1_dconfs) == 0:
+            ctx1, ctx_exit = self.split(stmt, ctx, retc)
+            ctx0.merge(ctx_exit)
+            if len(ctx1) == 0:
+                break
+            if self.bound.exceeded(stmt.getattr("lineno"), loop_cnt):
+                self.bound.cut(ctx1.total())
                 break
-            ctx.dconfs = ctx1_dconfs
+            ctx.load(ctx1)
             stmt.body.accept(self, ctx)
+            self.prune(ctx)
             loop_cnt = loop_cnt + 1
-            if loop_cnt > 1000:
-                print("Error: Too many loops.")
-                exit()
-        ctx.dconfs = ctx0_dconfs
+        ctx.load(ctx0)
+
+    def solve_loop(self, stmt: While, ctx: PConfiguration) -> bool:
+        """
+        Solve a loop as an absorbing Markov chain, and replace `ctx` by the distribution leaving it.
+        The chain is built by running the body once on every distinct state reaching the loop head.
+        Returns `False`, leaving `ctx` untouched, if the loop cannot be solved this way:
+        probabilities are not plain numbers (or the engine is not `PConfiguration`), a pruner is active,
+        there are too many states, or some states never leave the loop.
+        """
+        if not isinstance(ctx, PConfiguration) or type(self.topo) is not Topology or self.pruner is not None:
+            return False
+        index = dict()
+        states = list()
+
+        def state(dconf: DConfiguration) -> int:
+            key = dconf.key()
+            if key not in index:
+                index[key] = len(states)
+                states.append(dconf)
+            return index[key]
+
+        # the states hold the uniform variables too, while `ctx` is left as it is until the loop is solved
+        initial = [(state(dconf), dconf.prob) for dconf in ctx.full()]
+        rows, cols, vals = list(), list(), list()
+        exits = list()
+        i = 0
+        while i < len(states):
+            if len(states) > self.markov_states:
+                return False
+            single = type(ctx)([DConfiguration(states[i].mem, states[i].ent)])
+            body = self.split(stmt, single, stmt.cond.accept(self, single))[0]
+            if len(body) == 0:
+                exits.append(i)
+            else:
+                stmt.body.accept(self, body)
+                body.materialize()
+                for dconf in body:
+                    rows.append(i)
+                    cols.append(state(DConfiguration(dconf.mem, dconf.ent)))
+                    vals.append(dconf.prob)
+            i = i + 1
+        v = np.zeros(len(states))
+        for j, prob in initial:
+            v[j] = prob
+        x = solve_visits(len(states), rows, cols, vals, v)
+        # when every state leaves the loop, all the mass entering it leaves it too. A chain where some states never
+        # leave is singular, but rounding may hide it from the solver, which then returns huge visit counts
+        if x is None or not np.isclose(sum(x[j] for j in exits), v.sum(), rtol=1e-9, atol=1e-12):
+            return False
+        ctx.load(PConfiguration([DConfiguration(states[j].mem, states[j].ent, float(x[j])) for j in exits]))
+        return True
 
     def visitAssignment(self, stmt: Assignment, ctx: PConfiguration) -> None:
         rete = stmt.expr.accept(self, ctx)
@@ -62,12 +147,14 @@ class QNV(Visitor[PConfiguration, list]):
         ret1 = stmt.expr1.accept(self, ctx)
         ret2 = stmt.expr2.accept(self, ctx)
         ctx.cr(stmt.ident.value, ret1, ret2, self.topo)
+        self.prune(ctx)
 
     def visitAssignmentSw(self, stmt: AssignmentSw, ctx: PConfiguration) -> None:
         ret1 = stmt.expr1.accept(self, ctx)
         ret2 = stmt.expr2.accept(self, ctx)
         ret3 = stmt.expr3.accept(self, ctx)
         ctx.sw(stmt.ident.value, ret1, ret2, ret3, self.topo)
+        self.prune(ctx)
     
     def visitDe(self, stmt: De, ctx: PConfiguration) -> None:
         ret1 = stmt.expr1.accept(self, ctx)
@@ -76,70 +163,23 @@ class QNV(Visitor[PConfiguration, list]):
     
     def visitAssertion(self, stmt: Assertion, ctx: PConfiguration) -> None:
         retc = stmt.cond.accept(self, ctx)
-        ctx1 = PConfiguration(list())
-        for i in range(0, len(ctx.dconfs)):
-            if retc[i] != 0:
-                ctx1.dconfs.append(ctx.dconfs[i])
-        ctx.dconfs = ctx1.dconfs
+        ctx.load(self.split(stmt, ctx, retc)[0])
     
     def visitIdentifierList(self, node: IdentifierList, ctx: PConfiguration) -> None:
         pass
     
     def visitForget(self, stmt: Forget, ctx: PConfiguration) -> None:
         stmt.ident_list.accept(self, ctx)
-        new_ctx = PConfiguration(list())
-        for dconf in ctx.dconfs:
-            for ident in stmt.ident_list.children:
-                dconf.mem.pop(ident.value)
-            in_new_ctx = False
-            for new_dconf in new_ctx.dconfs:
-                if dconf.mem == new_dconf.mem and dconf.ent == new_dconf.ent:
-                    in_new_ctx = True
-                    new_dconf.prob = new_dconf.prob + dconf.prob
-                    break
-            if not in_new_ctx:
-                new_ctx.dconfs.append(dconf)
-        ctx.dconfs = new_ctx.dconfs
+        ctx.forget([ident.value for ident in stmt.ident_list.children], not stmt.getattr("implicit"))
                 
-    def visitUnary(self, expr: Unary, ctx: PConfiguration) -> list:
-        reto = expr.operand.accept(self, ctx)
-        ret = list()
-        for i in range(0, len(reto)):
-            ret.append({
-                node.UnaryOp.Neg: -reto[i],
-                node.UnaryOp.LogicNot: int(not reto[i])
-            }[expr.op])
-        return ret
+    def visitUnary(self, expr: Unary, ctx: PConfiguration):
+        return unary(expr.op, expr.operand.accept(self, ctx))
     
-    def visitBinary(self, expr: Binary, ctx: PConfiguration) -> list:
-        retl = expr.lhs.accept(self, ctx)
-        retr = expr.rhs.accept(self, ctx)
-        ret = list()
-        for i in range(0, len(retl)):
-            ret.append({
-                node.BinaryOp.Add: retl[i] + retr[i],
-                node.BinaryOp.Sub: retl[i] - retr[i],
-                node.BinaryOp.Mul: retl[i] * retr[i],
-                node.BinaryOp.Div: (retl[i] // retr[i]) if retr[i] != 0 else None,
-                node.BinaryOp.LogicOr: int(retl[i] or retr[i]),
-                node.BinaryOp.LogicAnd: int(retl[i] and retr[i]),
-                node.BinaryOp.EQ: int(retl[i] == retr[i]),
-                node.BinaryOp.NE: int(retl[i] != retr[i]),
-                node.BinaryOp.LT: int(retl[i] < retr[i]),
-                node.BinaryOp.LE: int(retl[i] <= retr[i]),
-                node.BinaryOp.GT: int(retl[i] > retr[i]),
-                node.BinaryOp.GE: int(retl[i] >= retr[i])
-            }[expr.op])
-        return ret
+    def visitBinary(self, expr: Binary, ctx: PConfiguration):
+        return binary(expr.op, expr.lhs.accept(self, ctx), expr.rhs.accept(self, ctx))
     
-    def visitIdentifier(self, ident: Identifier, ctx: PConfiguration) -> list:
-        ret = list()
-        for dconf in ctx.dconfs:
-            ret.append(dconf.mem[ident.value])
-        return ret
+    def visitIdentifier(self, ident: Identifier, ctx: PConfiguration):
+        return ctx.lookup(ident.value)
 
-    def visitIntLiteral(self, expr: IntLiteral, ctx: PConfiguration) -> list:
-        ret = list()
-        for i in range(0, len(ctx.dconfs)):
-            ret.append(expr.value)
-        return ret
\ No newline at end of file
+    def visitIntLiteral(self, expr: IntLiteral, ctx: PConfiguration):
+        return expr.value
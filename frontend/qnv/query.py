@@ -0,0 +1,219 @@
+"""
+Module that answers queries about the final distribution of an analysis without printing it.
+
+A query is one of
+    `P(test)`  the probability that `test` holds, e.g. `P(ret == 1 && d > 2)`;
+    `M(expr)`  the marginal distribution of `expr`, mapping every value to its probability, e.g. `M(ent(1, 16))`;
+    `E(expr)`  the expected value of `expr`;
+    `E(ent)`   the expected number of entangled pairs shared by every pair of nodes, as a matrix.
+Tests and expressions use the syntax of QNV programs, and `ent(x, y)` (with integer literals)
+denotes the number of pairs currently shared by nodes `x` and `y`.
+
+Probabilities are not normalised: they are those of the printed distribution, whose total may be below 1.
+Configurations where a variable used by a query is undefined (or that divide by zero) fail `P`,
+count as the value `None` in `M`, and contribute nothing to `E`.
+
+All queries are answered together by `run`, in a single pass over the configurations
+that gathers the columns they need, followed by vectorized reductions over these columns.
+"""
+
+import re
+
+import numpy as np
+
+from frontend.ast.tree import *
+from frontend.qnv.operators import binary, unary
+
+_QUERY = re.compile(r"\s*([PME])\s*\((.*)\)\s*", re.DOTALL)
+_ENT = re.compile(r"\bent\s*\(\s*(\d+)\s*,\s*(\d+)\s*\)")
+_ENT_PREFIX = "__ent_"
+
+
+def _parse(code: str) -> Program:
+    from frontend.lexer import lexer
+    from frontend.parser import parser
+
+    lexer.error_stack.clear()
+    parser.error_stack.clear()
+    lexer.lineno = 1
+    program = parser.parse(code, lexer=lexer)
+    errors = lexer.error_stack + parser.error_stack
+    if errors:
+        raise ValueError("\n".join(map(str, errors)))
+    return program
+
+
+def _identifiers(expr: Expression) -> set:
+    if isinstance(expr, Identifier):
+        return {expr.value}
+    if isinstance(expr, Unary):
+        return _identifiers(expr.operand)
+    if isinstance(expr, Binary):
+        return _identifiers(expr.lhs) | _identifiers(expr.rhs)
+    return set()
+
+
+class Query:
+    """
+    A parsed query: `kind` is `"P"`, `"M"` or `"E"`, and `expr` the test or expression,
+    or `None` for `E(ent)`. Raises `ValueError` if `text` is not a valid query.
+    """
+
+    def __init__(self, text: str):
+        self.text = text.strip()
+        match = _QUERY.fullmatch(text)
+        if match is None:
+            raise ValueError(f"invalid query: {text}")
+        self.kind, body = match.groups()
+        self.expr = None
+        if self.kind == "E" and body.strip() == "ent":
+            return
+        body = _ENT.sub(lambda m: f"{_ENT_PREFIX}{m.group(1)}_{m.group(2)}", body)
+        # tests and expressions are parsed as part of a statement, the only start symbol of the grammar
+        if self.kind == "P":
+            stmt = _parse(f"assert({body});").children[0]
+            self.expr = stmt.cond
+        else:
+            stmt = _parse(f"{_ENT_PREFIX}query = {body};").children[0]
+            self.expr = stmt.expr
+
+    def variables(self) -> set:
+        """Program variables the query reads."""
+        return {ident for ident in _identifiers(self.expr) if not ident.startswith(_ENT_PREFIX)} if self.expr else set()
+
+    def pairs(self) -> set:
+        """Node pairs `(x, y)`, `x <= y`, whose entanglement the query reads."""
+        ret = set()
+        for ident in _identifiers(self.expr) if self.expr else ():
+            if ident.startswith(_ENT_PREFIX):
+                x, y = map(int, ident.removeprefix(_ENT_PREFIX).split("_"))
+                ret.add((min(x, y), max(x, y)))
+        return ret
+
+    def __str__(self) -> str:
+        return self.text
+
+
+def _evaluate(expr: Expression, columns: dict):
+    if isinstance(expr, IntLiteral):
+        return expr.value
+    if isinstance(expr, Identifier):
+        return columns[expr.value]
+    if isinstance(expr, Unary):
+        return unary(expr.op, _evaluate(expr.operand, columns))
+    if isinstance(expr, Binary):
+        return binary(expr.op, _evaluate(expr.lhs, columns), _evaluate(expr.rhs, columns))
+    raise ValueError(f"unsupported expression in query: {expr}")
+
+
+def _probabilities(probs: list) -> np.ndarray:
+    """Column of probabilities: floats, one row of floats per configuration over a batch of topologies, or objects."""
+    try:
+        return np.array(probs, dtype=float)
+    except TypeError:
+        ret = np.empty(len(probs), dtype=object)
+        ret[:] = probs
+        return ret
+
+
+def _weighted(prob: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """`prob * values` row by row, whether `prob` has one or several columns."""
+    return prob * values.reshape((-1,) + (1,) * (prob.ndim - 1))
+
+
+def run(result, queries: list[Query], n: int) -> list:
+    """
+    Answer every query about `result` (anything with `records()`, see `PConfiguration.records`) over `n` nodes.
+    Returns one answer per query: a probability or an expected value for `P` and `E`
+    (a vector over a batch of topologies), a dict for `M`, and an `n` by `n` matrix for `E(ent)`.
+    """
+    names = sorted(set().union(*(query.variables() for query in queries)))
+    pairs = sorted(set().union(*(query.pairs() for query in queries)))
+    matrix = any(query.kind == "E" and query.expr is None for query in queries)
+
+    probs = list()
+    values = {name: list() for name in names}
+    counts = {pair: list() for pair in pairs}
+    ent_row, ent_x, ent_y, ent_count = list(), list(), list(), list()
+    for row, (prob, mem, links) in enumerate(result.records()):
+        probs.append(prob)
+        for name in names:
+            values[name].append(mem.get(name))
+        if pairs:
+            ent = {(x, y): cnt for x, y, cnt in links}
+            for pair in pairs:
+                counts[pair].append(ent.get(pair, 0))
+        if matrix:
+            for x, y, cnt in links:
+                ent_row.append(row)
+                ent_x.append(x - 1)
+                ent_y.append(y - 1)
+                ent_count.append(cnt)
+
+    prob = _probabilities(probs)
+    columns = dict()
+    defined = dict()
+    for name in names:
+        column = np.array(values[name], dtype=object)
+        defined[name] = np.not_equal(column, None)
+        columns[name] = np.where(defined[name], column, 0).astype(np.int64)
+    for (x, y), column in counts.items():
+        columns[f"{_ENT_PREFIX}{x}_{y}"] = columns[f"{_ENT_PREFIX}{y}_{x}"] = np.array(column, dtype=np.int64)
+
+    answers = list()
+    for query in queries:
+        if query.expr is None:
+            # every link `(x, y)` with `x < y` contributes to both `[x][y]` and `[y][x]`
+            xs, ys = np.array(ent_x, dtype=np.intp), np.array(ent_y, dtype=np.intp)
+            weights = _weighted(prob[np.array(ent_row, dtype=np.intp)], np.array(ent_count, dtype=np.int64))
+            off = xs != ys
+            ret = np.zeros((n, n) + prob.shape[1:], dtype=prob.dtype)
+            np.add.at(ret, (np.concatenate([xs, ys[off]]), np.concatenate([ys, xs[off]])),
+                      np.concatenate([weights, weights[off]]))
+            answers.append(ret)
+            continue
+        known = np.ones(len(prob), dtype=bool)
+        for name in query.variables():
+            known &= defined[name]
+        value = np.broadcast_to(_evaluate(query.expr, columns), prob.shape[:1])
+        if value.dtype == object:
+            known &= np.not_equal(value, None)
+            value = np.where(known, value, 0).astype(np.int64)
+        if query.kind == "P":
+            answers.append(prob[known & (value != 0)].sum(axis=0))
+        elif query.kind == "E":
+            answers.append(_weighted(prob[known], value[known]).sum(axis=0))
+        else:
+            ret = dict()
+            keys, inverse = np.unique(value[known], return_inverse=True)
+            sums = np.zeros((len(keys),) + prob.shape[1:], dtype=prob.dtype)
+            np.add.at(sums, inverse, prob[known])
+            for key, mass in zip(keys.tolist(), sums):
+                ret[key] = mass
+            if not known.all():
+                ret[None] = prob[~known].sum(axis=0)
+            answers.append(ret)
+    return answers
+
+
+def print_answers(queries: list[Query], answers: list, slack=0.0) -> None:
+    """
+    Print every query and its answer.
+    A nonzero `slack` (probability mass discarded or left unresolved) prints probabilities `p` as `[p, p + slack]`.
+    """
+
+    def _prob(p) -> str:
+        return f"[{p}, {p + slack}]" if slack else str(p)
+
+    for query, answer in zip(queries, answers):
+        if query.kind == "P":
+            print(f"{query} = {_prob(answer)}")
+        elif query.kind == "M":
+            print(f"{query} =")
+            for value, mass in sorted(answer.items(), key=lambda item: (item[0] is None, item[0] or 0)):
+                print(f"  {value}: {_prob(mass)}")
+        elif query.expr is None:
+            print(f"{query} =")
+            print(answer)
+        else:
+            print(f"{query} = {answer}")
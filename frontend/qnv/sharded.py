@@ -0,0 +1,211 @@
+"""
+Module that computes the semantic function of a QNV program exactly on several processes.
+
+Configurations evolve independently of each other between the points where they are merged,
+so the distribution is partitioned into shards, one per worker process, by a digest of the state `(mem, ent)`.
+Every worker receives the program once and interprets it on its own shard. The workers synchronise at the head
+of every `while` iteration, where they decide together whether the loop goes on (some configuration, in any shard,
+still satisfies the test), and outside of loops after every `cr` and `sw`, the statements that create states. At these points they
+send each other, directly, the configurations whose digest now belongs to another shard. Equal states thus end up
+in the same shard and are merged as in the serial analysis, and all workers run the same sequence of statements
+(`if` always runs both of its branches, possibly on no configurations). The shards are gathered, and merged, at the end.
+
+The distribution starts on a single shard and is spread over the others by the first `cr`, so straight-line programs
+(and those fully unrolled by `--opt`) are partitioned as well. Sharding pays off when the distribution is large
+compared to the number of synchronisation points: every one costs a round of messages between all workers.
+"""
+
+import multiprocessing
+import zlib
+
+from typing import Optional
+
+from frontend.ast.tree import *
+from frontend.qnv.bounds import LoopBound
+from frontend.qnv.configuration import DConfiguration, PConfiguration
+from frontend.qnv.entanglement import Entanglement
+from frontend.qnv.persistent import PMap
+from frontend.qnv.qnv import QNV
+from frontend.qnv.topology import Topology
+
+
+def _encode(dconf: DConfiguration, uniform: dict) -> tuple:
+    """
+    Plain, picklable form of a configuration, its `uniform` variables included: `(mem items, links items, prob)`,
+    both sorted. `PMap` caches hashes computed by the current process, so it is rebuilt on the receiving side
+    instead of being sent.
+    """
+    mem = dconf.mem.to_dict()
+    if uniform:
+        mem = dict(sorted({**mem, **uniform}.items()))
+    return tuple(mem.items()), tuple(sorted(dconf.ent.links.items())), dconf.prob
+
+
+def _decode(n: int, item: tuple) -> DConfiguration:
+    mem, links, prob = item
+    return DConfiguration(PMap(mem), Entanglement(n, PMap(links)), prob)
+
+
+def _receive(n: int, ctx: PConfiguration, item: tuple) -> None:
+    """Add an encoded configuration, whose `mem` holds every variable, to `ctx`, which may keep some of them uniform."""
+    mem, links, prob = item
+    mem = dict(mem)
+    ctx._materialize([ident for ident, value in ctx.uniform.items() if ident not in mem or mem[ident] != value])
+    for ident in ctx.uniform:
+        del mem[ident]
+    ctx.add(DConfiguration(PMap(mem.items()), Entanglement(n, PMap(links)), prob))
+
+
+def _shard_of(item: tuple, shards: int) -> int:
+    """Stable digest of the state, the same in every process (unlike `hash`, which is salted per process)."""
+    return zlib.crc32(repr(item[:2]).encode()) % shards
+
+
+class _ShardQNV(QNV):
+    """
+    The analysis run by worker `index`: `QNV` on its shard, whose loops synchronise with the other workers.
+    `inboxes[i]` is the queue worker `i` receives from.
+    """
+
+    def __init__(self, topo: Topology, index: int, shards: int, inboxes: list, bound: LoopBound):
+        super().__init__(topo, PConfiguration, None, 0, bound)
+        self.index = index
+        self.shards = shards
+        self.inboxes = inboxes
+        self.round = 0
+        # loops nested in the loop being run, and the size of the shard when it last sent configurations away
+        self.depth = 0
+        self.moved = 1
+        # messages of the next round, sent by workers that finished the current one first
+        self.early = list()
+
+    def analyse(self, program: Program) -> PConfiguration:
+        ctx = PConfiguration()
+        for dconf in PConfiguration.initial(self.topo):
+            if _shard_of(_encode(dconf, {}), self.shards) == self.index:
+                ctx.add(dconf)
+        program.accept(self, ctx)
+        return ctx
+
+    def exchange(self, ctx: PConfiguration, flags, move: bool) -> list:
+        """
+        Send every other worker `flags`, and the configurations of `ctx` that belong to its shard if `move`,
+        add those it sends to `ctx`, and return the flags of every worker.
+        """
+        out = [list() for _ in range(0, self.shards)]
+        for key, dconf in list(ctx.dconfs.items()) if move else ():
+            item = _encode(dconf, ctx.uniform)
+            shard = _shard_of(item, self.shards)
+            if shard != self.index:
+                del ctx.dconfs[key]
+                out[shard].append(item)
+        for shard, items in enumerate(out):
+            if shard != self.index:
+                self.inboxes[shard].put((self.round, flags, items))
+
+        received, self.early = self.early, list()
+        while len(received) < self.shards - 1:
+            message = self.inboxes[self.index].get()
+            (received if message[0] == self.round else self.early).append(message)
+        ret = [flags]
+        for _, other, items in received:
+            ret.append(other)
+            for item in items:
+                _receive(self.topo.n, ctx, item)
+        if move:
+            self.moved = max(len(ctx), 1)
+        self.round = self.round + 1
+        return ret
+
+    def visitWhile(self, stmt: While, ctx: PConfiguration) -> None:
+        ctx0 = ctx.empty()
+        loop_cnt = 0
+        while True:
+            ctx1, ctx_exit = ctx.split(stmt.cond.accept(self, ctx))
+            ctx0.merge(ctx_exit)
+            # whether the loop goes on is decided by all workers together, so that they run the same iterations.
+            # Configurations move to their shard at every iteration of the outermost loops, and in inner loops
+            # once the shard has doubled since it last sent any: equal states meet without shipping every
+            # configuration at every iteration
+            flags = self.exchange(ctx1, (len(ctx1) > 0, self.bound.exceeded(stmt.getattr("lineno"), loop_cnt)),
+                                  self.depth == 0 or len(ctx1) >= 2 * self.moved)
+            if not any(active for active, _ in flags):
+                break
+            if any(exceeded for _, exceeded in flags):
+                self.bound.cut(ctx1.total())
+                break
+            ctx.load(ctx1)
+            self.depth = self.depth + 1
+            stmt.body.accept(self, ctx)
+            self.depth = self.depth - 1
+            loop_cnt = loop_cnt + 1
+        ctx.load(ctx0)
+
+    def spread(self, ctx: PConfiguration) -> None:
+        """
+        Move the states created by a `cr` or an `sw` outside of any loop (those in a loop move at its next iteration),
+        once the shard has doubled since it last sent any, as in inner loops.
+        """
+        if self.depth == 0:
+            self.exchange(ctx, None, len(ctx) >= 2 * self.moved)
+
+    def visitAssignmentCr(self, stmt: AssignmentCr, ctx: PConfiguration) -> None:
+        super().visitAssignmentCr(stmt, ctx)
+        self.spread(ctx)
+
+    def visitAssignmentSw(self, stmt: AssignmentSw, ctx: PConfiguration) -> None:
+        super().visitAssignmentSw(stmt, ctx)
+        self.spread(ctx)
+
+
+def _serve(results, inboxes: list, topo: Topology, index: int, shards: int, bound: LoopBound,
+           program: Program) -> None:
+    try:
+        ctx = _ShardQNV(topo, index, shards, inboxes, bound).analyse(program)
+        results.put((True, ([_encode(dconf, ctx.uniform) for dconf in ctx], bound.unresolved, bound.cuts)))
+    except Exception as e:
+        results.put((False, e))
+
+
+class ShardedQNV:
+    """
+    Computes the same distribution as `QNV` with the `PConfiguration` engine, using `shards` worker processes.
+    Loops are bounded by `bound`, as in `QNV`.
+    """
+
+    def __init__(self, topo: Topology, shards: int, bound: Optional[LoopBound] = None):
+        self.topo = topo
+        self.shards = shards
+        self.bound = bound if bound is not None else LoopBound()
+
+    def analyse(self, program: Program) -> PConfiguration:
+        self.bound.start()
+        inboxes = [multiprocessing.Queue() for _ in range(0, self.shards)]
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=_serve, daemon=True,
+                                    args=(results, inboxes, self.topo, i, self.shards, self.bound, program))
+            for i in range(0, self.shards)
+        ]
+        for proc in procs:
+            proc.start()
+        try:
+            ctx = PConfiguration()
+            cuts = 0
+            for _ in range(0, self.shards):
+                ok, result = results.get()
+                if not ok:
+                    raise result
+                items, unresolved, worker_cuts = result
+                for item in items:
+                    ctx.add(_decode(self.topo.n, item))
+                self.bound.unresolved = self.bound.unresolved + unresolved
+                # every worker cuts the same loops
+                cuts = max(cuts, worker_cuts)
+            self.bound.cuts = self.bound.cuts + cuts
+        finally:
+            for proc in procs:
+                proc.join(timeout=1)
+                if proc.is_alive():
+                    proc.terminate()
+        return ctx
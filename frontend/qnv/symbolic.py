@@ -0,0 +1,173 @@
+"""
+Module that supports the symbolic analysis of QNV programs.
+
+With a `SymbolicTopology`, the success probability of `cr(x, y)` is the variable `px_y` (with `x < y`)
+and that of a swap at node `z` is the variable `qz`, so every configuration ends up with a `Polynomial`
+as its probability. The analysis is run once, and the resulting distribution can then be evaluated
+at any number of parameter points at once.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from frontend.qnv.topology import Topology
+
+
+def _mul_monomials(m1: tuple, m2: tuple) -> tuple:
+    exps = dict(m1)
+    for var, e in m2:
+        exps[var] = exps.get(var, 0) + e
+    return tuple(sorted(exps.items()))
+
+
+class Polynomial:
+    """
+    Sparse polynomial over named variables.
+    `terms` maps a monomial, a sorted tuple of `(variable, exponent)` pairs (`()` for the constant term),
+    to its non-zero coefficient.
+    """
+
+    __slots__ = ("terms",)
+
+    def __init__(self, terms: dict = None):
+        self.terms = terms if terms is not None else dict()
+
+    @staticmethod
+    def constant(c) -> Polynomial:
+        return Polynomial({(): float(c)} if c != 0 else dict())
+
+    @staticmethod
+    def variable(name: str) -> Polynomial:
+        return Polynomial({((name, 1),): 1.0})
+
+    @staticmethod
+    def _lift(other) -> Polynomial:
+        return other if isinstance(other, Polynomial) else Polynomial.constant(other)
+
+    def __add__(self, other) -> Polynomial:
+        terms = dict(self.terms)
+        for mono, coef in Polynomial._lift(other).terms.items():
+            coef = terms.get(mono, 0.0) + coef
+            if coef == 0:
+                terms.pop(mono, None)
+            else:
+                terms[mono] = coef
+        return Polynomial(terms)
+
+    __radd__ = __add__
+
+    def __neg__(self) -> Polynomial:
+        return Polynomial({mono: -coef for mono, coef in self.terms.items()})
+
+    def __sub__(self, other) -> Polynomial:
+        return self + -Polynomial._lift(other)
+
+    def __rsub__(self, other) -> Polynomial:
+        return Polynomial._lift(other) + -self
+
+    def __mul__(self, other) -> Polynomial:
+        ret = Polynomial()
+        for m2, c2 in Polynomial._lift(other).terms.items():
+            ret = ret + Polynomial({_mul_monomials(m1, m2): c1 * c2 for m1, c1 in self.terms.items()})
+        return ret
+
+    __rmul__ = __mul__
+
+    def variables(self) -> set:
+        return {var for mono in self.terms for var, _ in mono}
+
+    def evaluate(self, points: dict):
+        """
+        Evaluate at many points at once.
+        `points` maps every variable to a scalar or to an array holding its value at each point.
+        """
+        ret = 0.0
+        for mono, coef in self.terms.items():
+            term = coef
+            for var, e in mono:
+                term = term * np.asarray(points[var], dtype=float) ** e
+            ret = ret + term
+        return ret
+
+    def __str__(self) -> str:
+        if not self.terms:
+            return "0"
+        ret = ""
+        for mono, coef in sorted(self.terms.items(), key=lambda item: (sum(e for _, e in item[0]), item[0])):
+            factors = [var if e == 1 else f"{var}^{e}" for var, e in mono]
+            if abs(coef) != 1 or not factors:
+                factors.insert(0, f"{abs(coef):g}")
+            sign = "-" if coef < 0 else "+"
+            ret = ret + (f" {sign} " if ret else ("-" if coef < 0 else "")) + "*".join(factors)
+        return ret
+
+    __repr__ = __str__
+
+
+def link_variable(x, y) -> str:
+    return f"p{min(x, y)}_{max(x, y)}"
+
+
+def swap_variable(z) -> str:
+    return f"q{z}"
+
+
+class SymbolicTopology:
+    """
+    Topology whose link and swap probabilities are variables.
+    The graph (which links exist) and the capacities are those of the numeric topology `topo`,
+    whose probabilities serve as the default value of the variables.
+    """
+
+    def __init__(self, topo: Topology):
+        self.topo = topo
+        self.n = topo.n
+        self.m = topo.m
+
+    def link(self, x, y) -> Polynomial:
+        return Polynomial.variable(link_variable(x, y))
+
+    def swap(self, z) -> Polynomial:
+        return Polynomial.variable(swap_variable(z))
+
+    def capacity(self, x):
+        return self.topo.capacity(x)
+
+    def connected(self, x, y) -> bool:
+        return self.topo.connected(x, y)
+
+    def defaults(self) -> dict:
+        """The value of every variable in the numeric topology."""
+        values = {swap_variable(x): self.topo.swap(x) for x in range(1, self.n + 1)}
+        for x, y, prob in self.topo.edges():
+            if prob >= 1e-8:
+                values[link_variable(x, y)] = prob
+        return values
+
+    def print(self):
+        self.topo.print()
+
+
+def read_points(f, defaults: dict) -> dict:
+    """
+    Read parameter points: a header line naming variables, then one line of values per point.
+    Variables missing from the header keep their value in `defaults`.
+    """
+    names = f.readline().split()
+    rows = [line.split() for line in f if line.strip()]
+    values = np.array(rows, dtype=float).reshape(len(rows), len(names))
+    points = {var: np.full(len(rows), value, dtype=float) for var, value in defaults.items()}
+    for i, var in enumerate(names):
+        points[var] = values[:, i]
+    return points
+
+
+def print_evaluated(pconf, points: dict) -> None:
+    """Print every configuration of a symbolic distribution with its probabilities at all points, on one line."""
+    size = len(next(iter(points.values())))
+    for dconf in pconf.full():
+        print(" ".join(map(str, np.broadcast_to(Polynomial._lift(dconf.prob).evaluate(points), (size,)).tolist())))
+        print(dconf.mem)
+        print(dconf.ent)
+        print('')
@@ -1,31 +1,251 @@
+import itertools
+import struct
+import sys
+
 import numpy as np
 
 class Topology:
+    """
+    A quantum network: `n` nodes, `m` links.
+    `p` maps every link `(x, y)` with `x < y` to its success probability, so that memory is proportional to `m`,
+    `adj[x - 1]` lists the neighbours of node `x`, and `q` and `s` hold the swap probability and capacity of each node.
+    The file is read in a single pass, one line per link.
+    """
+
     def __init__(self, f):
+        self.n, self.m = (int(token) for token in f.readline().split()[:2])
+        self.p = dict()
+        self.adj = [list() for _ in range(0, self.n)]
+        for _ in range(0, self.m):
+            x, y, prob = f.readline().split()[:3]
+            x, y = int(x), int(y)
+            key = (x, y) if x < y else (y, x)
+            if key not in self.p:
+                self.adj[x - 1].append(y)
+                self.adj[y - 1].append(x)
+            self.p[key] = float(prob)
+        self.q = [float(token) for token in f.readline().split()[:self.n]]
         line = f.readline()
-        self.n = int(line.split()[0])
-        self.m = int(line.split()[1])
-        self.p = np.zeros((self.n, self.n), dtype=float)
-        self.q = [0.0] * self.n
-        self.s = [-1] * self.n
+        self.s = [float(token) for token in line.split()[:self.n]] if line else [-1] * self.n
+        self._keys = None
+        self._probs = None
+
+    def link(self, x, y):
+        """Success probability of `cr(x, y)`."""
+        return self.p.get((x, y) if x < y else (y, x), 0.0)
+
+    def swap(self, z):
+        """Success probability of a swap at node `z`."""
+        return self.q[z - 1]
+
+    def capacity(self, x):
+        """Maximum number of pairs node `x` may share with one neighbour (-1: unlimited)."""
+        return self.s[x - 1]
+
+    def connected(self, x, y) -> bool:
+        """Whether `cr(x, y)` can succeed at all."""
+        return self.link(x, y) >= 1e-8
+
+    def links(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """`link` for arrays of nodes, through a sorted array of link keys built on first use."""
+        if self._keys is None:
+            pairs = np.array(list(self.p.keys()), dtype=np.int64).reshape(-1, 2)
+            keys = pairs[:, 0] * (self.n + 1) + pairs[:, 1]
+            order = np.argsort(keys)
+            self._keys = keys[order]
+            self._probs = np.fromiter(self.p.values(), dtype=float, count=len(self.p))[order]
+        keys = np.minimum(xs, ys).astype(np.int64) * (self.n + 1) + np.maximum(xs, ys)
+        if len(self._keys) == 0:
+            return np.zeros(keys.shape)
+        idx = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return np.where(self._keys[idx] == keys, self._probs[idx], 0.0)
+
+    def edges(self):
+        """Every link as `(x, y, probability)` with `x < y`, in increasing order of `(x, y)`."""
+        for (x, y), prob in sorted(self.p.items()):
+            yield x, y, prob
+
+    def print(self):
+        """Print the topology as an edge list, one link per line as in topology files, not as a dense matrix."""
+        print(self.n)
+        print(self.m)
+        for x, y, prob in self.edges():
+            print(x, y, prob)
+        print(self.q)
+
+
+# Binary topology format (`.topb`), little-endian:
+# a 64-byte header holding `MAGIC`, `n` and `m` (int64), then the arrays
+#   start  int64[n + 1]  links of node `x` (as their smaller end) are at positions `start[x - 1]` to `start[x]`
+#   u      int32[m]      smaller end of every link, in increasing order of `(u, v)`
+#   v      int32[m]      larger end of every link
+#   p      float64[m]    success probability of every link
+#   q      float64[n]    swap probability of every node
+#   s      float64[n]    capacity of every node
+MAGIC = b"QNVTOPB1"
+_HEADER = 64
+_LAYOUT = [
+    ("start", np.int64, lambda n, m: n + 1),
+    ("u", np.int32, lambda n, m: m),
+    ("v", np.int32, lambda n, m: m),
+    ("p", np.float64, lambda n, m: m),
+    ("q", np.float64, lambda n, m: n),
+    ("s", np.float64, lambda n, m: n),
+]
+
+
+def _sections(n: int, m: int):
+    """`(name, dtype, offset, count)` of every array of a binary topology, each aligned to 8 bytes."""
+    offset = _HEADER
+    for name, dtype, size in _LAYOUT:
+        count = size(n, m)
+        yield name, dtype, offset, count
+        offset = offset + (count * np.dtype(dtype).itemsize + 7) // 8 * 8
+
+
+def write_binary(topo: Topology, path: str) -> None:
+    """Save `topo` in the binary format read by `MappedTopology`."""
+    m = len(topo.p)
+    pairs = np.fromiter(itertools.chain.from_iterable(topo.p.keys()), dtype=np.int64, count=2 * m).reshape(m, 2)
+    order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+    arrays = {
+        "u": pairs[order, 0],
+        "v": pairs[order, 1],
+        "p": np.fromiter(topo.p.values(), dtype=np.float64, count=m)[order],
+        "q": np.asarray(topo.q, dtype=np.float64),
+        "s": np.asarray(topo.s, dtype=np.float64),
+    }
+    arrays["start"] = np.searchsorted(arrays["u"], np.arange(1, topo.n + 2))
+    with open(path, "wb") as f:
+        f.write(struct.pack("<8sqq", MAGIC, topo.n, m).ljust(_HEADER, b"\0"))
+        for name, dtype, offset, count in _sections(topo.n, m):
+            f.seek(offset)
+            f.write(arrays[name].astype(np.dtype(dtype).newbyteorder("<"), copy=False).tobytes())
+
+
+class MappedTopology:
+    """
+    A topology in the binary format, memory-mapped read-only: loading it copies nothing, and processes
+    mapping the same file share its pages. Pickling it (e.g. to send it to worker processes) only sends its path.
+    Answers the same queries as `Topology`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, self.n, self.m = struct.unpack_from("<8sqq", buf)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary topology")
+        for name, dtype, offset, count in _sections(self.n, self.m):
+            setattr(self, name, np.frombuffer(buf, dtype=np.dtype(dtype).newbyteorder("<"), count=count, offset=offset))
+        self._cache = dict()
+
+    def __reduce__(self):
+        return MappedTopology, (self.path,)
+
+    def link(self, x, y):
+        """Success probability of `cr(x, y)`."""
+        if x > y:
+            x, y = y, x
+        ret = self._cache.get((x, y))
+        if ret is None:
+            lo, hi = self.start[x - 1], self.start[x]
+            i = lo + np.searchsorted(self.v[lo:hi], y)
+            ret = float(self.p[i]) if i < hi and self.v[i] == y else 0.0
+            self._cache[(x, y)] = ret
+        return ret
+
+    def swap(self, z):
+        """Success probability of a swap at node `z`."""
+        return float(self.q[z - 1])
+
+    def capacity(self, x):
+        """Maximum number of pairs node `x` may share with one neighbour (-1: unlimited)."""
+        return float(self.s[x - 1])
+
+    def connected(self, x, y) -> bool:
+        """Whether `cr(x, y)` can succeed at all."""
+        return self.link(x, y) >= 1e-8
+
+    def links(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """`link` for arrays of nodes, looking up every distinct pair once."""
+        keys = np.minimum(xs, ys).astype(np.int64) * (self.n + 1) + np.maximum(xs, ys)
+        pairs, inverse = np.unique(keys, return_inverse=True)
+        probs = np.array([self.link(*divmod(int(key), self.n + 1)) for key in pairs])
+        return probs[inverse].reshape(keys.shape)
+
+    def edges(self):
+        """Every link as `(x, y, probability)` with `x < y`, in increasing order of `(x, y)`."""
         for i in range(0, self.m):
-            line = f.readline()
-            self.p[int(line.split()[0]) - 1][int(line.split()[1]) - 1] = float(line.split()[2])
-            self.p[int(line.split()[1]) - 1][int(line.split()[0]) - 1] = float(line.split()[2])
-        line = f.readline()
-        _q = line.split()
-        for i in range(0, self.n):
-            self.q[i] = float(_q[i])
-        line = f.readline()
-        if not line:
-            return
-        _s = line.split()
-        for i in range(0, self.n):
-            self.s[i] = float(_s[i])
-        
-    
+            yield int(self.u[i]), int(self.v[i]), float(self.p[i])
+
     def print(self):
         print(self.n)
         print(self.m)
-        print(self.p)
-        print(self.q)
\ No newline at end of file
+        for x, y, prob in self.edges():
+            print(x, y, prob)
+        print(self.q.tolist())
+
+
+def read_topology(path: str):
+    """A `MappedTopology` if `path` holds a binary topology, a `Topology` parsed from its text otherwise."""
+    with open(path, "rb") as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    if binary:
+        return MappedTopology(path)
+    with open(path, "r") as f:
+        return Topology(f)
+
+
+def _connected_pairs(topo) -> set:
+    return {(x, y) for x, y, prob in topo.edges() if prob >= 1e-8}
+
+
+class TopologyBatch:
+    """
+    Several topologies sharing one graph and the same capacities, analysed in a single pass.
+    `link` and `swap` return vectors holding the probability in every topology,
+    so that the probability of each configuration becomes a vector as well.
+    """
+
+    def __init__(self, topos: list):
+        first = topos[0]
+        for topo in topos[1:]:
+            if topo.n != first.n:
+                raise ValueError("topologies in a batch must have the same number of nodes")
+            if _connected_pairs(topo) != _connected_pairs(first):
+                raise ValueError("topologies in a batch must have the same links")
+            if list(topo.s) != list(first.s):
+                raise ValueError("topologies in a batch must have the same capacities")
+        self.topos = topos
+        self.n = first.n
+        self.m = first.m
+        self.p = {key: np.array([topo.link(*key) for topo in topos]) for key in _connected_pairs(first)}
+        self.q = np.array([topo.q for topo in topos]).T
+        self.s = first.s
+
+    def __len__(self) -> int:
+        return len(self.topos)
+
+    def link(self, x, y):
+        ret = self.p.get((x, y) if x < y else (y, x))
+        return ret if ret is not None else np.zeros(len(self.topos))
+
+    def swap(self, z):
+        return self.q[z - 1]
+
+    def capacity(self, x):
+        return self.s[x - 1]
+
+    def connected(self, x, y) -> bool:
+        return self.topos[0].connected(x, y)
+
+    def print(self):
+        for topo in self.topos:
+            topo.print()
+
+
+if __name__ == "__main__":
+    # convert a text topology to the binary format: python -m frontend.qnv.topology input.top output.topb
+    with open(sys.argv[1], "r") as f:
+        write_binary(Topology(f), sys.argv[2])
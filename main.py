@@ -1,22 +1,114 @@
 import argparse
+import hashlib
+import os
 import sys
-import numpy as np
 
+from frontend.ast import cache
 from frontend.ast.tree import Program
-from frontend.lexer import lexer
-from frontend.parser import parser
-from frontend.qnv.topology import Topology
-from frontend.qnv.qnv import QNV
+from frontend.qnv.bounds import LoopBound
 from utils.printtree import TreePrinter
 
+# The lexer, the parser and the analysis (which needs NumPy) are imported by the stages that use them,
+# so that runs that only print the AST or hit the AST cache do not pay for them.
+
 
 def parseArgs():
     parser = argparse.ArgumentParser(description="Quantum Network Verifier")
     parser.add_argument("--input", type=str, help="the input qnv file")
     parser.add_argument("--parse", action="store_true", help="output parsed AST")
     parser.add_argument("--qnv", action="store_true", help="output semantic function result")
-    parser.add_argument("--topo", type=str, help="the input topology file")
-    return parser.parse_args()
+    parser.add_argument("--topo", type=str, nargs="+",
+                        help="the input topology file, or several topologies sharing one graph to analyse together")
+    parser.add_argument("--engine", choices=["dict", "batch"], default="dict",
+                        help="configuration engine: one object per configuration (dict) or column-wise arrays (batch)")
+    parser.add_argument("--exec", choices=["visitor", "ir"], default="visitor",
+                        help="walk the AST (visitor) or compile it to IR and run the IR (ir)")
+    parser.add_argument("--ir", action="store_true", help="output compiled IR")
+    parser.add_argument("--ir-cache", type=str, help="file to load the compiled IR from, or to save it to")
+    parser.add_argument("--ast-cache", type=str, help="directory caching parsed programs, keyed by a hash of their source")
+    parser.add_argument("--prune-eps", type=float, default=0.0,
+                        help="drop configurations whose probability is below this threshold")
+    parser.add_argument("--prune-budget", type=float, default=0.0,
+                        help="drop the least probable configurations up to this total probability mass")
+    parser.add_argument("--beam", type=int, default=0,
+                        help="keep at most this many (the most probable) configurations after every branching statement")
+    parser.add_argument("--opt", action="store_true",
+                        help="optimize the program: constant propagation, loop unrolling, cr folding, dead assignments")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="run the exact analysis on this many worker processes (dict engine, AST only); "
+                             "pays off on multi-core machines for programs with large distributions")
+    parser.add_argument("--mc", action="store_true",
+                        help="estimate the semantic function result by Monte Carlo simulation instead of computing it")
+    parser.add_argument("--samples", type=int, default=10000, help="maximum number of Monte Carlo trajectories")
+    parser.add_argument("--precision", type=float, default=0.0,
+                        help="stop sampling once every confidence interval has at most this half-width")
+    parser.add_argument("--confidence", type=float, default=0.95, help="confidence level of the Monte Carlo intervals")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes simulating trajectories")
+    parser.add_argument("--seed", type=int, help="seed of the Monte Carlo random number generator")
+    parser.add_argument("--symbolic", action="store_true",
+                        help="keep link and swap probabilities as variables and output polynomial probabilities")
+    parser.add_argument("--sweep", type=str,
+                        help="evaluate the symbolic result at the parameter points listed in this file")
+    parser.add_argument("--markov", action="store_true",
+                        help="solve while loops exactly as absorbing Markov chains instead of unrolling them")
+    parser.add_argument("--markov-states", type=int, default=2000,
+                        help="unroll the loops that reach more than this many states at their head")
+    parser.add_argument("--max-iterations", type=int, default=1000,
+                        help="stop unrolling a loop after this many iterations and report the mass still in it")
+    parser.add_argument("--loop-bound", type=str, action="append", default=[], metavar="LINE=N",
+                        help="iteration bound of the while loop starting at line LINE (may be repeated)")
+    parser.add_argument("--time-limit", type=float, default=0.0,
+                        help="stop unrolling every loop after this many seconds of analysis")
+    parser.add_argument("--auto-forget", action="store_true",
+                        help="forget every variable as soon as it is dead, so that configurations merge")
+    parser.add_argument("--keep", type=str, default="",
+                        help="comma-separated variables kept until the end (and in the result) with --auto-forget")
+    parser.add_argument("--output", type=str,
+                        help="write the resulting configurations to this file ('-' for stdout) instead of printing them as text")
+    parser.add_argument("--format", choices=["ndjson", "npz"],
+                        help="format of --output: one JSON object per line, or NumPy columnar arrays (default: by extension)")
+    parser.add_argument("--sort-prob", action="store_true",
+                        help="write the configurations in decreasing order of probability (with --output)")
+    parser.add_argument("--top", type=int, default=0,
+                        help="write only this many configurations, the most probable ones (with --output)")
+    parser.add_argument("--query", type=str, action="append", default=[],
+                        help="print the answer to this query instead of the configurations, e.g. 'P(ret == 1)', "
+                             "'M(ent(1, 16))', 'E(d)' or 'E(ent)' (may be repeated)")
+    parser.add_argument("--factor", action="store_true",
+                        help="keep independent parts of the distribution as separate factors (dict engine, AST only)")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the time, configurations, merges and dropped mass of every source line to stderr")
+    parser.add_argument("--trace", type=str,
+                        help="write the run of every statement to this file as a Chrome trace (JSON) timeline")
+    args = parser.parse_args()
+    try:
+        args.loop_bound = {int(line): int(n) for line, n in (item.split("=") for item in args.loop_bound)}
+    except ValueError:
+        parser.error("--loop-bound expects LINE=N")
+    if args.topo and len(args.topo) > 1 and (args.engine == "batch" or args.mc or args.symbolic or args.sweep
+                                               or args.prune_eps > 0 or args.prune_budget > 0 or args.beam > 0):
+        parser.error("several topologies require the dict engine without --mc, --symbolic or pruning")
+    if (args.symbolic or args.sweep) and (args.engine == "batch" or args.mc
+                                          or args.prune_eps > 0 or args.prune_budget > 0 or args.beam > 0):
+        parser.error("--symbolic and --sweep require the dict engine without --mc or pruning")
+    if args.shards > 1 and (args.engine == "batch" or args.exec == "ir" or args.markov
+                            or args.prune_eps > 0 or args.prune_budget > 0 or args.beam > 0):
+        parser.error("--shards requires the dict engine and the AST executor, without --markov or pruning")
+    if args.mc and (args.samples < 1 or args.engine == "batch" or args.exec == "ir"):
+        parser.error("--mc requires --samples of at least 1, the dict engine and the AST executor")
+    if args.factor and (args.engine == "batch" or args.exec == "ir" or args.mc or args.shards > 1
+                        or args.prune_eps > 0 or args.prune_budget > 0 or args.beam > 0):
+        parser.error("--factor requires the dict engine and the AST executor, without --mc, --shards or pruning")
+    if (args.profile or args.trace) and (args.exec == "ir" or args.mc or args.shards > 1 or args.factor
+                                         or args.symbolic or args.sweep):
+        parser.error("--profile and --trace require the AST executor, without --mc, --shards, --factor or --symbolic")
+    if (args.output or args.query) and (args.mc or args.symbolic or args.sweep):
+        parser.error("--output and --query are not available with --mc, --symbolic or --sweep")
+    if (args.sort_prob or args.top > 0) and not args.output:
+        parser.error("--sort-prob and --top require --output")
+    if args.output and args.format is None:
+        args.format = "npz" if args.output.endswith(".npz") else "ndjson"
+    return args
 
 
 def readCode(fileName):
@@ -27,6 +119,14 @@ def readCode(fileName):
 # The parser stage: QNV code -> Abstract syntax tree
 def step_parse(args: argparse.Namespace):
     code = readCode(args.input)
+    if args.ast_cache:
+        r = cache.load(args.ast_cache, code)
+        if r is not None:
+            return r
+
+    from frontend.lexer import lexer
+    from frontend.parser import parser
+
     r: Program = parser.parse(code, lexer=lexer)
 
     errors = parser.error_stack
@@ -34,18 +134,100 @@ def step_parse(args: argparse.Namespace):
         print("\n".join(map(str, errors)), file=sys.stderr)
         exit(1)
 
+    if args.ast_cache:
+        cache.save(args.ast_cache, code, r)
     return r
 
 
-# The analysis stage: Abstract syntax tree -> Semantic function result
-def step_qnv(args: argparse.Namespace, p: Program):
-    f = open(args.topo, "r")
-    topo = Topology(f)
-    f.close()
-    print("======Quantum Network Topology======")
-    topo.print()
-    print('')
-    qnv = QNV(topo)
+def readTopo(args: argparse.Namespace):
+    if not args.topo:
+        return None
+    from frontend.qnv.topology import TopologyBatch, read_topology
+
+    topos = [read_topology(fileName) for fileName in args.topo]
+    if len(topos) == 1:
+        return topos[0]
+    try:
+        return TopologyBatch(topos)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        exit(1)
+
+
+# The optimization stage: Abstract syntax tree -> Optimized abstract syntax tree
+def step_opt(args: argparse.Namespace, p: Program, topo):
+    if args.opt:
+        from frontend.passes.optimizer import optimize
+
+        # loops the analysis would cut are not unrolled
+        p = optimize(p, topo, LoopBound(args.max_iterations, args.loop_bound))
+    if args.auto_forget:
+        from frontend.passes.liveness import insert_forgets
+
+        p = insert_forgets(p, {ident.strip() for ident in args.keep.split(",") if ident.strip()})
+    return p
+
+
+# The compilation stage: Abstract syntax tree -> IR
+def step_ir(args: argparse.Namespace, topo):
+    from frontend.ir.compiler import compile_program
+    from frontend.ir.instr import IRProgram
+
+    def _compile():
+        return compile_program(step_opt(args, step_parse(args), topo))
+
+    if not args.ir_cache:
+        return _compile()
+    source = f"{IRProgram.FORMAT}\0" + readCode(args.input)
+    if args.opt:
+        # the optimized program depends on the topology and on the loop bounds as well
+        source = source + "\0opt\0" + "".join(map(readCode, args.topo or []))
+        source = source + f"\0{args.max_iterations}\0{sorted(args.loop_bound.items())}"
+    if args.auto_forget:
+        source = source + "\0forget\0" + args.keep
+    key = hashlib.sha256(source.encode()).hexdigest()
+    if os.path.exists(args.ir_cache):
+        ir = IRProgram.load(args.ir_cache, key)
+        if ir is not None:
+            return ir
+    ir = _compile()
+    ir.save(args.ir_cache, key)
+    return ir
+
+
+# The analysis stage: Abstract syntax tree (or IR) -> Semantic function result
+def step_qnv(args: argparse.Namespace, topo, p, pruner=None, bound=None, hooks=None):
+    from frontend.ir.instr import IRProgram
+    from frontend.qnv.batch import BatchConfiguration
+    from frontend.qnv.configuration import PConfiguration
+    from frontend.qnv.executor import Executor
+    from frontend.qnv.qnv import QNV
+
+    if not args.output:
+        print("======Quantum Network Topology======")
+        topo.print()
+        print('')
+    engine = BatchConfiguration if args.engine == "batch" else PConfiguration
+    if args.mc:
+        from frontend.qnv.montecarlo import MonteCarlo
+
+        return MonteCarlo(topo, args.samples, args.precision, args.confidence, args.workers,
+                          seed=args.seed, bound=bound).analyse(p)
+    if args.factor:
+        from frontend.qnv.factored import FactoredQNV
+
+        return FactoredQNV(topo, args.markov_states if args.markov else 0, bound).analyse(p)
+    if args.shards > 1:
+        from frontend.qnv.sharded import ShardedQNV
+
+        return ShardedQNV(topo, args.shards, bound).analyse(p)
+    if isinstance(p, IRProgram):
+        return Executor(topo, engine, pruner, bound).analyse(p)
+    if hooks is not None:
+        from frontend.qnv.hooks import HookedQNV
+
+        return HookedQNV(hooks, topo, engine, pruner, args.markov_states if args.markov else 0, bound).analyse(p)
+    qnv = QNV(topo, engine, pruner, args.markov_states if args.markov else 0, bound)
     res = qnv.analyse(p)
     return res
 
@@ -57,17 +239,87 @@ def main():
         r = step_parse(args)
         return r
 
+    pruner = None
+    if args.prune_eps > 0 or args.prune_budget > 0 or args.beam > 0:
+        from frontend.qnv.pruning import Pruner
+
+        pruner = Pruner(args.prune_eps, args.prune_budget, args.beam)
+    bound = LoopBound(args.max_iterations, args.loop_bound, args.time_limit)
+    profiler = None
+    if args.profile or args.trace:
+        from frontend.qnv.profiler import Profiler
+
+        profiler = Profiler(trace=bool(args.trace))
+
+    queries = list()
+    if args.query:
+        from frontend.qnv.query import Query
+
+        try:
+            queries = [Query(text) for text in args.query]
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            exit(1)
+
     def _qnv():
-        tac = step_qnv(args, _parse())
-        return tac
+        topo = readTopo(args)
+        if args.symbolic or args.sweep:
+            from frontend.qnv.symbolic import SymbolicTopology
+
+            topo = SymbolicTopology(topo)
+        prog = step_ir(args, topo) if args.exec == "ir" and not args.mc else step_opt(args, _parse(), topo)
+        tac = step_qnv(args, topo, prog, pruner, bound, profiler)
+        return tac, topo
 
     if args.qnv:
-        res = _qnv()
-        print("======Quantum Network Verifier======")
-        res.print()
+        res, topo = _qnv()
+        slack = (pruner.discarded if pruner is not None else 0.0) + bound.unresolved
+        if not args.output:
+            print("======Quantum Network Verifier======")
+        if queries:
+            from frontend.qnv.query import print_answers, run
+
+            print_answers(queries, run(res, queries, topo.n), slack)
+        if args.sweep:
+            from frontend.qnv.symbolic import print_evaluated, read_points
+
+            with open(args.sweep, "r") as f:
+                print_evaluated(res, read_points(f, topo.defaults()))
+        elif args.output:
+            from frontend.qnv.output import select, write_ndjson, write_npz
+
+            records = select(res.records(), args.sort_prob, args.top)
+            if args.format == "npz":
+                write_npz(records, args.output, topo.n, slack)
+            else:
+                write_ndjson(records, args.output, slack)
+            if pruner is not None:
+                print(f"Discarded probability mass: {pruner.discarded}", file=sys.stderr)
+        elif queries:
+            pass
+        elif args.topo and len(args.topo) > 1:
+            for fileName, k in zip(args.topo, range(0, len(args.topo))):
+                print(f"------{fileName}------")
+                res.component(k).print()
+        elif args.mc:
+            res.print()
+        else:
+            res.print(slack)
+            if pruner is not None:
+                print(f"Discarded probability mass: {pruner.discarded}")
+        if bound.cuts and not args.mc:
+            print(f"Unresolved probability mass (loop bound reached): {bound.unresolved}",
+                  file=sys.stderr if args.output else sys.stdout)
+        if args.profile:
+            profiler.print_table()
+        if args.trace:
+            profiler.write_trace(args.trace)
+
+    elif args.ir:
+        step_ir(args, readTopo(args)).print()
 
     elif args.parse:
-        prog = _parse()
+        prog = step_opt(args, _parse(), readTopo(args))
         printer = TreePrinter(indentLen=2)
         printer.work(prog)
 
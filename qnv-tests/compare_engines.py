@@ -0,0 +1,142 @@
+"""
+Checks that every engine and execution mode computes the same distribution as the default analysis.
+
+Runs every program of this directory (on `testN.top` for the programs named `testN...`, on `test0.top` otherwise)
+with `main.py --qnv` and the default options, writing NDJSON, then with every variant below, and compares
+their final configurations: the same states, with probabilities within `--tolerance`. The default run is also
+written as NPZ and read back, so that both writers are checked on every program.
+Prints one line per run and exits with status 1 if any result differs or any run fails.
+
+    python qnv-tests/compare_engines.py [--tests DIR] [--tolerance T] [--timeout S] [--variant "OPTIONS"]...
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS)
+
+VARIANTS = [
+    "--engine batch",
+    "--exec ir",
+    "--engine batch --exec ir",
+    "--opt",
+    "--markov",
+    "--shards 2",
+    "--factor",
+]
+
+
+def cases(tests: str):
+    """`(program, topology)` paths of every program of the directory `tests`."""
+    for name in sorted(os.listdir(tests)):
+        if not name.endswith(".qnv"):
+            continue
+        topo = os.path.join(tests, name[:-len(".qnv")].split("_")[0] + ".top")
+        if not os.path.exists(topo):
+            topo = os.path.join(tests, "test0.top")
+        yield os.path.join(tests, name), topo
+
+
+def run(program: str, topo: str, output: str, options: list[str], timeout: float) -> None:
+    """Run `main.py --qnv`; raises `RuntimeError` if it fails or lasts more than `timeout` seconds."""
+    argv = [sys.executable, os.path.join(ROOT, "main.py"), "--qnv", "--input", program, "--topo", topo,
+            "--output", output] + options
+    try:
+        proc = subprocess.run(argv, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"timed out after {timeout} s")
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode(errors="replace").strip() or f"exit status {proc.returncode}")
+
+
+def _state(mem: dict, links) -> tuple:
+    return tuple(sorted(mem.items())), tuple(sorted(tuple(link) for link in links))
+
+
+def load_ndjson(path: str) -> dict:
+    """The distribution of an NDJSON result, as a dict from states to probabilities."""
+    ret = dict()
+    with open(path, "r") as f:
+        for line in f:
+            record = json.loads(line)
+            state = _state(record["mem"], record["ent"])
+            ret[state] = ret.get(state, 0.0) + record["prob"]
+    return ret
+
+
+def load_npz(path: str) -> dict:
+    """The distribution of an NPZ result, in the form of `load_ndjson`."""
+    data = np.load(path)
+    names = data["names"].tolist()
+    mems = [dict() for _ in range(data["prob"].shape[0])]
+    links = [list() for _ in mems]
+    for row, var, val, defined in zip(data["mem_row"], data["mem_var"], data["mem_val"], data["mem_defined"]):
+        mems[row][names[var]] = int(val) if defined else None
+    for row, x, y, count in zip(data["ent_row"], data["ent_x"], data["ent_y"], data["ent_count"]):
+        links[row].append((int(x), int(y), int(count)))
+    ret = dict()
+    for prob, mem, link in zip(data["prob"].tolist(), mems, links):
+        state = _state(mem, link)
+        ret[state] = ret.get(state, 0.0) + prob
+    return ret
+
+
+def differences(expected: dict, actual: dict, tolerance: float) -> list[str]:
+    """The states whose probability differs by more than `tolerance`, missing states included."""
+    ret = list()
+    for state in expected.keys() | actual.keys():
+        old, new = expected.get(state, 0.0), actual.get(state, 0.0)
+        if abs(old - new) > tolerance:
+            ret.append(f"mem {dict(state[0])} ent {list(state[1])}: {old}, got {new}")
+    return sorted(ret)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare every engine and mode of main.py --qnv with the default one")
+    parser.add_argument("--tests", type=str, default=TESTS, help="directory of the programs")
+    parser.add_argument("--tolerance", type=float, default=1e-9,
+                        help="largest accepted difference between the probabilities of a state")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds after which a run is abandoned")
+    parser.add_argument("--variant", type=str, action="append",
+                        help="options of main.py to compare with the default run (the built-in variants by default)")
+    args = parser.parse_args()
+
+    problems = list()
+    with tempfile.TemporaryDirectory() as workdir:
+        for program, topo in cases(args.tests):
+            name = os.path.basename(program)
+            expected_path = os.path.join(workdir, "expected.ndjson")
+            try:
+                run(program, topo, expected_path, [], args.timeout)
+            except RuntimeError as e:
+                problems.append(f"{name} []: {e}")
+                print(f"{name:<20} {'(default)':<28} error", file=sys.stderr)
+                continue
+            expected = load_ndjson(expected_path)
+
+            runs = [("--format npz", load_npz, ".npz")] + [(variant, load_ndjson, ".ndjson")
+                                                          for variant in args.variant or VARIANTS]
+            for variant, load, suffix in runs:
+                path = os.path.join(workdir, "actual" + suffix)
+                try:
+                    run(program, topo, path, variant.split(), args.timeout)
+                    found = differences(expected, load(path), args.tolerance)
+                except RuntimeError as e:
+                    found = [str(e)]
+                print(f"{name:<20} {variant:<28} {'differs' if found else 'ok'}", file=sys.stderr)
+                problems.extend(f"{name} [{variant}]: {problem}" for problem in found)
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Focused checks of the persistent maps, of the Markov-chain loop solver and of its fallback to unrolling.
+
+    python -m pytest qnv-tests/test_units.py
+    python qnv-tests/test_units.py
+"""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from frontend.ast.tree import *
+from frontend.qnv.bounds import LoopBound
+from frontend.qnv.configuration import PConfiguration
+from frontend.qnv.markov import solve_visits
+from frontend.qnv.persistent import PMap
+from frontend.qnv.qnv import QNV
+from frontend.qnv.query import _parse
+from frontend.qnv.topology import Topology
+
+# nodes 1 and 2 linked with probability 0.3, node 3 isolated
+TOPOLOGY = "3 1\n1 2 0.3\n0.9 0.9 0.9\n"
+
+
+def _topology() -> Topology:
+    return Topology(io.StringIO(TOPOLOGY))
+
+
+def _state(ctx: PConfiguration) -> tuple:
+    """Everything `solve_loop` may change in `ctx`."""
+    return dict(ctx.uniform), {key: (dconf.mem, dconf.ent, dconf.prob) for key, dconf in ctx.dconfs.items()}
+
+
+def test_pmap_order_independent():
+    # enough keys for several levels of the trie; -1 and -2 have the same hash in CPython, so they share a collision node
+    items = [(i * 7919, i) for i in range(0, 200)] + [(-1, "a"), (-2, "b")]
+    forward = PMap(items)
+    backward = PMap(reversed(items))
+    built = PMap()
+    for key, value in sorted(items, key=repr):
+        built = built.set(key, value)
+    assert forward == backward == built
+    assert hash(forward) == hash(backward) == hash(built)
+    assert forward.to_dict() == dict(items)
+    assert forward != forward.set(0, -1)
+    assert forward != forward.remove(-1)
+
+
+def test_pmap_persistent():
+    original = PMap([(i, i) for i in range(0, 100)] + [(-1, "a"), (-2, "b")])
+    copy = original.to_dict()
+    changed = original.set(1, 100).set(1000, 0).discard(2).discard(1001).remove(-1)
+    assert original.to_dict() == copy
+    assert len(original) == len(copy)
+    assert changed[1] == 100 and changed[1000] == 0
+    assert 2 not in changed and -1 not in changed and changed[-2] == "b"
+    assert original.discard(1001) == original
+
+
+def test_solve_visits():
+    # state 0 stays with probability 0.5 and moves to the absorbing state 1 otherwise
+    x = solve_visits(2, [0, 0], [0, 1], [0.5, 0.5], [1.0, 0.0])
+    assert np.allclose(x, [2.0, 1.0])
+    # state 0 never leaves
+    assert solve_visits(1, [0], [0], [1.0], [1.0]) is None
+
+
+def test_retry_loop_solved():
+    program = _parse("ret = 0;\nwhile(ret == 0) {\n    ret = cr(1, 2);\n}\n")
+    bound = LoopBound(max_iterations=5)
+    ctx = QNV(_topology(), markov_states=100, bound=bound).analyse(program)
+    records = list(ctx.records())
+    assert len(records) == 1
+    prob, mem, links = records[0]
+    # unrolled to 5 iterations, 0.7 ** 5 of the mass would be unresolved
+    assert abs(prob - 1.0) < 1e-12
+    assert mem == {"ret": 1} and links == [(1, 2, 1)]
+    assert bound.cuts == 0 and bound.unresolved == 0.0
+
+
+def test_closed_loop_falls_back():
+    # `r` flips between 0 and 1 forever: a closed recurrent class, from which no state leaves the loop
+    program = _parse("x = 0;\nr = 0;\nwhile(x == 0) {\n    r = cr(1, 2);\n    de(1, 2);\n}\n")
+    qnv = QNV(_topology(), markov_states=100, bound=LoopBound(max_iterations=5))
+    ctx = PConfiguration.initial(_topology())
+    for stmt in program.children[:2]:
+        stmt.accept(qnv, ctx)
+    before = _state(ctx)
+    assert ctx.uniform
+    assert not qnv.solve_loop(program.children[2], ctx)
+    assert _state(ctx) == before
+
+    bound = LoopBound(max_iterations=5)
+    ctx = QNV(_topology(), markov_states=100, bound=bound).analyse(program)
+    assert len(ctx) == 0
+    assert bound.cuts == 1 and abs(bound.unresolved - 1.0) < 1e-12
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")